@@ -0,0 +1,67 @@
+import os
+import sys
+import difflib
+
+"""
+* setiap direktori tugas dibiarkan berdiri sendiri (bisa dijalankan dan
+dikumpulkan tanpa direktori lain), sehingga modul pendukung yang sama
+disalin ke beberapa direktori tugas
+
+* skrip ini memastikan salinan tersebut tetap identik: jalankan dari root
+repo setelah mengubah salah satu modul di SHARED_MODULES, lalu salin
+perubahan ke direktori lain yang tercantum. Exit code 1 jika ada salinan
+yang berbeda atau hilang
+
+* modul dengan nama sama yang memang berbeda per tugas (client.py,
+file_interface.py, file_protocol.py) tidak diperiksa
+"""
+
+SHARED_MODULES = {
+    'admission.py': ['tugas-ets', 'tugas-2', 'tugas-3', 'tugas-4'],
+    'file_cache.py': ['tugas-ets', 'tugas-3', 'tugas-4'],
+    'file_map.py': ['tugas-ets', 'tugas-4'],
+    'dir_index.py': ['tugas-ets', 'tugas-4'],
+    'server_backends.py': ['tugas-2', 'tugas-3'],
+}
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as fp:
+        return fp.readlines()
+
+
+def check(root='.'):
+    # daftar pesan kesalahan, kosong jika semua salinan identik
+    errors = []
+    for module, dirs in SHARED_MODULES.items():
+        paths = [os.path.join(root, d, module) for d in dirs]
+        missing = [p for p in paths if not os.path.isfile(p)]
+        errors += [f"{p}: missing" for p in missing]
+        present = [p for p in paths if p not in missing]
+        if not present:
+            continue
+        # salinan pertama yang ada menjadi acuan
+        reference = present[0]
+        expected = read_lines(reference)
+        for path in present[1:]:
+            actual = read_lines(path)
+            if actual != expected:
+                diff = difflib.unified_diff(expected, actual, reference, path)
+                errors.append(f"{path}: differs from {reference}\n" + ''.join(diff))
+    return errors
+
+
+def main():
+    root = os.path.dirname(os.path.abspath(__file__))
+    errors = check(root)
+    for error in errors:
+        print(error)
+    if errors:
+        print(f"{len(errors)} shared module copies out of sync")
+        return 1
+    print(f"all copies of {len(SHARED_MODULES)} shared modules are identical")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
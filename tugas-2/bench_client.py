@@ -0,0 +1,130 @@
+import argparse
+import selectors
+import socket
+import time
+
+from server_backends import raise_fd_limit
+
+"""
+* benchmark untuk server TIME: membuka N koneksi sekaligus, lalu setiap
+koneksi mengirim "TIME\\r\\n", menunggu balasan "JAM HH:MM:SS\\r\\n", dan
+langsung mengirim request berikutnya selama --duration detik
+
+* client berjalan di satu thread dengan selectors, sehingga ribuan koneksi
+tidak membutuhkan ribuan thread di sisi client dan yang terukur adalah server
+
+* dipakai untuk membandingkan backend server, misalnya:
+  python3 server.py --backend pool --port 45000
+  python3 server.py --backend selector --port 45001
+  python3 bench_client.py --port 45000 --connections 1000
+  python3 bench_client.py --port 45001 --connections 1000
+"""
+
+REQUEST = b"TIME\r\n"
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * p / 100.0))
+    return sorted_values[index]
+
+
+def open_connections(address, count, timeout):
+    # koneksi dibuka satu per satu; koneksi yang gagal dihitung, tidak menghentikan benchmark
+    connections = []
+    failed = 0
+    for _ in range(count):
+        try:
+            sock = socket.create_connection(address, timeout=timeout)
+        except OSError:
+            failed += 1
+            continue
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setblocking(False)
+        connections.append(sock)
+    return connections, failed
+
+
+def run(address, count, duration, timeout=5):
+    raise_fd_limit(count + 64)
+    start_connect = time.perf_counter()
+    connections, failed = open_connections(address, count, timeout)
+    connect_time = time.perf_counter() - start_connect
+
+    sel = selectors.DefaultSelector()
+    sent_at = {}
+    buffers = {}
+    for sock in connections:
+        sel.register(sock, selectors.EVENT_READ)
+        buffers[sock] = b""
+
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    for sock in connections:
+        sent_at[sock] = time.perf_counter()
+        sock.send(REQUEST)
+
+    while sent_at and time.perf_counter() < deadline:
+        for key, _ in sel.select(timeout=0.5):
+            sock = key.fileobj
+            try:
+                data = sock.recv(4096)
+            except OSError:
+                data = b""
+            if not data:
+                # koneksi ditutup server (misalnya karena penuh)
+                errors += 1
+                sel.unregister(sock)
+                sent_at.pop(sock, None)
+                sock.close()
+                continue
+            buffers[sock] += data
+            if not buffers[sock].endswith(b"\r\n"):
+                continue
+            now = time.perf_counter()
+            latencies.append(now - sent_at[sock])
+            buffers[sock] = b""
+            if now < deadline:
+                sent_at[sock] = now
+                sock.send(REQUEST)
+    elapsed = time.perf_counter() - start
+
+    for sock in list(sent_at):
+        try:
+            sock.setblocking(True)
+            sock.sendall(b"QUIT")
+        except OSError:
+            pass
+        sock.close()
+    sel.close()
+
+    latencies.sort()
+    return dict(connections=len(connections), connect_failed=failed, closed_by_server=errors,
+                connect_s=connect_time, requests=len(latencies),
+                requests_per_sec=len(latencies) / elapsed if elapsed > 0 else 0,
+                p50_ms=percentile(latencies, 50) * 1000, p99_ms=percentile(latencies, 99) * 1000,
+                max_ms=(latencies[-1] if latencies else 0) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TIME server benchmark client')
+    parser.add_argument('--host', default='127.0.0.1', help='Server host (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=45000, help='Server port (default: 45000)')
+    parser.add_argument('--connections', type=int, nargs='+', default=[100, 1000],
+                        help='Concurrent connections, one run per value (default: 100 1000)')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per run (default: 10)')
+    args = parser.parse_args()
+
+    print(f"{'conns':>7} {'failed':>7} {'closed':>7} {'connect_s':>10} {'req/s':>10} "
+          f"{'p50_ms':>8} {'p99_ms':>8} {'max_ms':>8}")
+    for count in args.connections:
+        r = run((args.host, args.port), count, args.duration)
+        print(f"{r['connections']:>7} {r['connect_failed']:>7} {r['closed_by_server']:>7} {r['connect_s']:>10.2f} "
+              f"{r['requests_per_sec']:>10.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['max_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
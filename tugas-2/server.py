@@ -3,59 +3,89 @@ import socket
 from datetime import datetime
 import threading
 import logging
+import time
+
+from server_backends import BACKENDS, serve, raise_fd_limit
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-class ProcessTheClient(threading.Thread):
-    def __init__(self, connection, address):
-        self.connection = connection
+MAX_LINE = 1024
+# selector/asyncio melayani semua koneksi di satu thread, sehingga batasnya jauh lebih besar dari pool
+MAX_CLIENTS = {'pool': 100, 'selector': 20000, 'asyncio': 20000}
+
+# (detik, balasan) terakhir: "JAM HH:MM:SS" dibuat paling banyak sekali per detik
+# dan dipakai bersama oleh semua koneksi
+jam_cache = (None, b"")
+
+def jam_response():
+    global jam_cache
+    now = time.time()
+    detik = int(now)
+    if jam_cache[0] != detik:
+        jam_cache = (detik, ("JAM " + datetime.strftime(datetime.fromtimestamp(detik), "%H:%M:%S") + "\r\n").encode('utf-8'))
+    return jam_cache[1]
+
+class ProcessTheClient:
+    # satu perintah per baris "\r\n": TIME dijawab dengan jam saat ini, QUIT
+    # (boleh tanpa "\r\n") mengakhiri sesi, perintah lain menutup koneksi.
+    # Tidak bergantung pada backend (lihat server_backends.py)
+    def __init__(self, address):
         self.address = address
-        threading.Thread.__init__(self)
+        self.buffer = b""
 
-    def run(self):
-        while True:
-            try:
-                data = self.connection.recv(32)
-                if data:
-                    data = data.decode('utf-8')
-                    if data.startswith("TIME") and data.endswith("\r\n"):
-                        resp = "JAM " + datetime.strftime(datetime.now(), "%H:%M:%S") + "\r\n"
-                        logging.info(f"[SENDING] Response to client {self.address}")
-                        self.connection.sendall(resp.encode('utf-8'))
-                    elif data.startswith("QUIT"):
-                        logging.info(f"[CLIENT EXIT] Client from {self.address} has exited. Bye bye.")
-                        resp = "invalid req\r\n"
-                        self.connection.sendall(resp.encode('utf-8'))
-                    else:
-                        logging.warning(f"[INVALID REQUEST] From {self.address}")
-                        self.connection.close()
-                        break
-            except OSError as e:
-                logging.error(f"[ERROR] OSError occurred: {e}")
-                break
-        self.connection.close()
+    def feed(self, data):
+        self.buffer += data
+        balasan = []
+        while self.buffer:
+            if self.buffer.startswith(b"QUIT"):
+                logging.info(f"[CLIENT EXIT] Client from {self.address} has exited. Bye bye.")
+                balasan.append(b"invalid req\r\n")
+                return b"".join(balasan), True
+            end = self.buffer.find(b"\r\n")
+            if end < 0:
+                if len(self.buffer) <= MAX_LINE:
+                    break
+                end = len(self.buffer)
+            line, self.buffer = self.buffer[:end], self.buffer[end + 2:]
+            if line.startswith(b"TIME"):
+                logging.debug(f"[SENDING] Response to client {self.address}")
+                balasan.append(jam_response())
+            else:
+                logging.warning(f"[INVALID REQUEST] From {self.address}")
+                return b"".join(balasan), True
+        return b"".join(balasan), False
 
 class Server(threading.Thread):
-    def __init__(self):
-        self.the_clients = []
+    def __init__(self, port=45000, backend='pool', max_clients=None, backlog=1024):
+        self.port = port
+        self.backend = backend
+        self.max_clients = max_clients or MAX_CLIENTS[backend]
+        self.backlog = backlog
         self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         threading.Thread.__init__(self)
 
     def run(self):
-        self.my_socket.bind(('0.0.0.0', 45000))
-        self.my_socket.listen(1)
-        logging.info("[SERVER STARTED] Listening on port 45000")
-        while True:
-            self.connection, self.client_address = self.my_socket.accept()
-            logging.info(f"[CONNECTION] From {self.client_address}")
-            clt = ProcessTheClient(self.connection, self.client_address)
-            clt.start()
-            self.the_clients.append(clt)
+        self.my_socket.bind(('0.0.0.0', self.port))
+        self.my_socket.listen(self.backlog)
+        raise_fd_limit(self.max_clients + 64)
+        logging.info(f"[SERVER STARTED] Listening on port {self.port}")
+        serve(self.backend, self.my_socket, ProcessTheClient, max_clients=self.max_clients)
 
 def main():
-    svr = Server()
+    import argparse
+    parser = argparse.ArgumentParser(description='TIME server')
+    parser.add_argument('--port', type=int, default=45000, help='Server port (default: 45000)')
+    parser.add_argument('--backend', choices=BACKENDS, default='pool',
+                        help='Concurrency backend: thread pool, selector event loop or asyncio (default: pool)')
+    parser.add_argument('--max-clients', type=int, default=None,
+                        help='Connections served at once, extra connections are closed (default: 100 for pool, 20000 otherwise)')
+    parser.add_argument('--backlog', type=int, default=1024, help='Listen backlog (default: 1024)')
+    args = parser.parse_args()
+    svr = Server(port=args.port, backend=args.backend, max_clients=args.max_clients, backlog=args.backlog)
     svr.start()
+    # executor di thread server tidak bisa dibuat lagi jika main thread sudah selesai
+    svr.join()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
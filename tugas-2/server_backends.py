@@ -0,0 +1,236 @@
+import time
+import asyncio
+import logging
+import selectors
+import concurrent.futures
+
+from admission import AdmissionController
+
+"""
+* backend konkurensi yang bisa dipilih server: 'pool' (ThreadPoolExecutor
+dengan AdmissionController), 'selector' (satu thread, event loop
+selectors) atau 'asyncio'. Semua backend membatasi jumlah koneksi yang
+dilayani sekaligus (max_clients), dan koneksi yang selesai langsung
+dilepas, tidak disimpan dalam list yang terus membesar
+
+* protokol tidak bergantung pada backend: session_factory(address)
+membuat objek sesi per koneksi dengan method feed(data) yang
+mengembalikan (balasan dalam bytes, apakah koneksi harus ditutup)
+
+* busy_reply(retry_after) menghasilkan balasan untuk koneksi yang ditolak
+karena server penuh; None berarti koneksi langsung ditutup
+
+* pada backend selector feed dijalankan langsung di event loop, jadi
+pekerjaan yang lama (misalnya GET file besar) menahan koneksi lain; pada
+asyncio feed dijalankan di executor jika offload=True
+"""
+
+BACKENDS = ('pool', 'selector', 'asyncio')
+RECV_SIZE = 64*1024
+IDLE_TIMEOUT = 300
+
+
+def serve(backend, listen_socket, session_factory, max_clients=50, max_pending=None, busy_reply=None,
+          idle_timeout=IDLE_TIMEOUT, offload=False):
+    logging.warning(f"serving with backend {backend}, max {max_clients} clients")
+    if backend == 'pool':
+        serve_pool(listen_socket, session_factory, max_clients, max_pending, busy_reply, idle_timeout)
+    elif backend == 'selector':
+        serve_selector(listen_socket, session_factory, max_clients, busy_reply, idle_timeout)
+    elif backend == 'asyncio':
+        asyncio.run(serve_asyncio(listen_socket, session_factory, max_clients, busy_reply, idle_timeout, offload))
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+
+def raise_fd_limit(needed):
+    # setiap koneksi memakai satu file descriptor, soft limit dinaikkan sampai hard limit jika perlu
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft != resource.RLIM_INFINITY and soft < needed:
+            target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            logging.info(f"[FD LIMIT] raised from {soft} to {target}")
+    except (ImportError, ValueError, OSError) as e:
+        logging.warning(f"[FD LIMIT] could not raise file descriptor limit: {e}")
+
+
+def handle_connection(connection, address, session_factory, idle_timeout=IDLE_TIMEOUT, release=None):
+    # satu koneksi dengan socket blocking, dipakai oleh backend pool.
+    # release() melepas slot AdmissionController sebelum balasan terakhir dikirim,
+    # agar client yang langsung menyambung lagi tidak mendapat BUSY
+    session = session_factory(address)
+    try:
+        connection.settimeout(idle_timeout)
+        while True:
+            data = connection.recv(RECV_SIZE)
+            if not data:
+                break
+            reply, close = session.feed(data)
+            if close and release is not None:
+                release()
+            if reply:
+                connection.sendall(reply)
+            if close:
+                break
+    except OSError as e:
+        logging.warning(f"error on connection {address}: {e}")
+    finally:
+        if release is not None:
+            release()
+        connection.close()
+
+
+def serve_pool(listen_socket, session_factory, max_clients, max_pending=None, busy_reply=None,
+               idle_timeout=IDLE_TIMEOUT):
+    def send_busy(connection, address, retry_after):
+        connection.sendall(busy_reply(retry_after))
+    reject = send_busy if busy_reply is not None else None
+
+    def handle(connection, address, release=None):
+        handle_connection(connection, address, session_factory, idle_timeout, release)
+
+    admission = AdmissionController(max_clients, max_pending, reject=reject)
+    with concurrent.futures.ThreadPoolExecutor(max_clients) as executor:
+        while True:
+            connection, address = listen_socket.accept()
+            logging.info(f"connection from {address}")
+            admission.submit(executor.submit, handle, connection, address, early_release=True)
+
+
+class SelectorConnection:
+    def __init__(self, sock, address, session):
+        self.sock = sock
+        self.address = address
+        self.session = session
+        self.outbox = bytearray()
+        self.close_after_send = False
+        self.last_active = time.monotonic()
+        self.events = selectors.EVENT_READ
+
+
+def serve_selector(listen_socket, session_factory, max_clients, busy_reply=None, idle_timeout=IDLE_TIMEOUT):
+    sel = selectors.DefaultSelector()
+    listen_socket.setblocking(False)
+    sel.register(listen_socket, selectors.EVENT_READ)
+    connections = {}
+    next_sweep = time.monotonic() + 1
+
+    def close(conn):
+        sel.unregister(conn.sock)
+        del connections[conn.sock]
+        conn.sock.close()
+
+    def flush(conn):
+        # mengirim sebanyak mungkin tanpa blocking, sisanya menunggu EVENT_WRITE
+        try:
+            while conn.outbox:
+                sent = conn.sock.send(conn.outbox)
+                del conn.outbox[:sent]
+        except BlockingIOError:
+            pass
+        if not conn.outbox and conn.close_after_send:
+            close(conn)
+            return
+        # modify (epoll_ctl) hanya jika event yang ditunggu berubah
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if conn.outbox else 0)
+        if events != conn.events:
+            conn.events = events
+            sel.modify(conn.sock, events, conn)
+
+    try:
+        while True:
+            for key, mask in sel.select(timeout=1.0):
+                if key.data is None:
+                    while True:
+                        try:
+                            sock, address = listen_socket.accept()
+                        except BlockingIOError:
+                            break
+                        sock.setblocking(False)
+                        if len(connections) >= max_clients:
+                            logging.warning(f"server busy, rejecting connection from {address}")
+                            try:
+                                if busy_reply is not None:
+                                    sock.send(busy_reply(1))
+                            except OSError:
+                                pass
+                            sock.close()
+                            continue
+                        logging.info(f"connection from {address}")
+                        conn = SelectorConnection(sock, address, session_factory(address))
+                        connections[sock] = conn
+                        sel.register(sock, selectors.EVENT_READ, conn)
+                    continue
+
+                conn = key.data
+                try:
+                    if mask & selectors.EVENT_READ and not conn.close_after_send:
+                        data = conn.sock.recv(RECV_SIZE)
+                        if not data:
+                            close(conn)
+                            continue
+                        conn.last_active = time.monotonic()
+                        reply, conn.close_after_send = conn.session.feed(data)
+                        conn.outbox += reply
+                    flush(conn)
+                except OSError as e:
+                    logging.warning(f"error on connection {conn.address}: {e}")
+                    if conn.sock in connections:
+                        close(conn)
+
+            # koneksi idle terlalu lama ditutup; diperiksa sekali per detik, bukan setiap
+            # putaran, karena jumlah koneksi bisa puluhan ribu
+            now = time.monotonic()
+            if now >= next_sweep:
+                next_sweep = now + 1
+                for conn in [c for c in connections.values() if now - c.last_active > idle_timeout]:
+                    close(conn)
+    finally:
+        for conn in list(connections.values()):
+            close(conn)
+        sel.close()
+
+
+async def serve_asyncio(listen_socket, session_factory, max_clients, busy_reply=None, idle_timeout=IDLE_TIMEOUT,
+                        offload=False):
+    loop = asyncio.get_running_loop()
+    active = 0
+
+    async def handle(reader, writer):
+        nonlocal active
+        address = writer.get_extra_info('peername')
+        if active >= max_clients:
+            logging.warning(f"server busy, rejecting connection from {address}")
+            if busy_reply is not None:
+                writer.write(busy_reply(1))
+            writer.close()
+            return
+        active += 1
+        logging.info(f"connection from {address}")
+        session = session_factory(address)
+        try:
+            while True:
+                data = await asyncio.wait_for(reader.read(RECV_SIZE), idle_timeout)
+                if not data:
+                    break
+                if offload:
+                    reply, close = await loop.run_in_executor(None, session.feed, data)
+                else:
+                    reply, close = session.feed(data)
+                if reply:
+                    writer.write(reply)
+                    await writer.drain()
+                if close:
+                    break
+        except (asyncio.TimeoutError, OSError) as e:
+            logging.warning(f"connection {address} closed: {e!r}")
+        finally:
+            active -= 1
+            writer.close()
+
+    listen_socket.setblocking(False)
+    server = await asyncio.start_server(handle, sock=listen_socket)
+    async with server:
+        await server.serve_forever()
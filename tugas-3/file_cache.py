@@ -0,0 +1,112 @@
+import os
+import threading
+from collections import OrderedDict
+
+"""
+* LRUCache menyimpan isi file yang sudah siap kirim (sudah di-encode),
+dibatasi total ukurannya (max_bytes). Entry yang paling lama tidak dipakai
+dibuang lebih dulu
+
+* key selalu diawali path absolut file, diikuti mtime dan ukuran file,
+sehingga file yang berubah di disk otomatis tidak cocok lagi dengan entry
+lama. Upload/delete juga memanggil invalidate(path) agar memorinya langsung
+dibebaskan
+
+* jika banyak thread meminta file yang sama pada saat yang bersamaan, hanya
+satu yang membaca dan meng-encode file, yang lain menunggu hasilnya
+"""
+
+
+def file_key(filename, *variant):
+    st = os.stat(filename)
+    return (os.path.abspath(filename), st.st_mtime_ns, st.st_size) + variant
+
+
+class LRUCache:
+    def __init__(self, max_bytes=256*1024*1024, max_entry_bytes=None):
+        self.max_bytes = max_bytes
+        # default: satu entry boleh memakai setengah budget
+        self.max_entry_bytes = max_entry_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.loading = {}
+
+    def entry_limit(self):
+        if self.max_entry_bytes is not None:
+            return min(self.max_entry_bytes, self.max_bytes)
+        return self.max_bytes // 2
+
+    def fits(self, size):
+        return 0 < size <= self.entry_limit()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_or_load(self, key, loader):
+        # loader dipanggil tanpa lock, hasil None tidak disimpan
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+            event = self.loading.get(key)
+            owner = event is None
+            if owner:
+                event = self.loading[key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            with self.lock:
+                value = self.entries.get(key)
+            return value if value is not None else loader()
+
+        try:
+            value = loader()
+            if value is not None:
+                self.put(key, value)
+            return value
+        finally:
+            with self.lock:
+                self.loading.pop(key, None)
+            event.set()
+
+    def put(self, key, value):
+        if len(value) > self.entry_limit():
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes and self.entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def invalidate(self, filename):
+        path = os.path.abspath(filename)
+        with self.lock:
+            for key in [k for k in self.entries if k[0] == path]:
+                self.size -= len(self.entries.pop(key))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            return dict(hits=self.hits, misses=self.misses, entries=len(self.entries),
+                        size=self.size, max_bytes=self.max_bytes)
@@ -3,10 +3,14 @@ import json
 import base64
 from glob import glob
 
+from file_cache import LRUCache, file_key
+
 
 class FileInterface:
     def __init__(self):
         os.chdir('files/')
+        # cache isi file (base64) yang sering diminta, lihat file_cache.py
+        self.cache = LRUCache()
 
     def list(self,params=[]):
         try:
@@ -20,11 +24,20 @@ class FileInterface:
             filename = params[0]
             if (filename == ''):
                 return None
-            fp = open(f"{filename}",'rb')
-            isifile = base64.b64encode(fp.read()).decode()
+            isifile = self.cache.get_or_load(file_key(filename), lambda: self._read_base64(filename))
             return dict(status='OK',data_namafile=filename,data_file=isifile)
         except Exception as e:
             return dict(status='ERROR',data=str(e))
+
+    def _read_base64(self, filename):
+        with open(f"{filename}",'rb') as fp:
+            return base64.b64encode(fp.read()).decode()
+
+    def cache_stats(self,params=[]):
+        try:
+            return dict(status='OK',data=self.cache.stats())
+        except Exception as e:
+            return dict(status='ERROR',data=str(e))
         
     def upload(self, params=[]):
         try:
@@ -33,6 +46,8 @@ class FileInterface:
                 return dict(status='ERROR', data='Nama file tidak boleh kosong')
             fp = open(filename, 'wb')
             fp.write(base64.b64decode(params[1]))
+            fp.close()
+            self.cache.invalidate(filename)
             return dict(status='OK', data='File berhasil diupload')
         except Exception as e:
             return dict(status='ERROR', data=str(e))
@@ -43,6 +58,7 @@ class FileInterface:
             if (filename == ''):
                 return dict(status='ERROR', data='Nama file tidak boleh kosong')
             os.remove(filename)
+            self.cache.invalidate(filename)
             return dict(status='OK', data='File berhasil dihapus')
         except Exception as e:
             return dict(status='ERROR', data=str(e))
@@ -2,41 +2,50 @@ from socket import *
 import socket
 import threading
 import logging
+import json
 import time
 import sys
 
 from file_protocol import  FileProtocol
+from server_backends import BACKENDS, serve
 fp = FileProtocol()
 
-class ProcessTheClient(threading.Thread):
-    def __init__(self, connection, address):
-        self.connection = connection
-        self.address = address
-        threading.Thread.__init__(self)
-
-    def run(self):
-        try:
-            buffer = ""
-            while "\r\n\r\n" not in buffer:
-                chunk = self.connection.recv(32).decode()
-                if not chunk:
-                    break
-                buffer += chunk
+# paling banyak MAX_CLIENTS koneksi dilayani sekaligus, koneksi berikutnya mendapat status BUSY
+BACKLOG = 128
+MAX_CLIENTS = 50
 
-            buffer = buffer.strip()
+def busy_reply(retry_after=1):
+    hasil = json.dumps(dict(status='BUSY', data=f"server busy, retry after {retry_after}s")) + "\r\n\r\n"
+    return hasil.encode()
 
-            hasil = fp.proses_string(buffer) + "\r\n\r\n"
-            self.connection.sendall(hasil.encode())
+class ProcessTheClient:
+    # satu request per koneksi: data dikumpulkan sampai "\r\n\r\n", lalu balasan
+    # dikirim dan koneksi ditutup. Tidak bergantung pada backend (lihat server_backends.py)
+    def __init__(self, address):
+        self.address = address
+        self.buffer = bytearray()
+        self.scan_from = 0
 
+    def feed(self, data):
+        self.buffer += data
+        end = self.buffer.find(b"\r\n\r\n", self.scan_from)
+        if end < 0:
+            self.scan_from = max(0, len(self.buffer) - 3)
+            return b'', False
+        try:
+            request = self.buffer[:end].decode().strip()
+            hasil = fp.proses_string(request) + "\r\n\r\n"
         except Exception as e:
             logging.warning(f"Error di handler: {e}")
-        finally:
-            self.connection.close()
+            return b'', True
+        return hasil.encode(), True
 
 class Server(threading.Thread):
-    def __init__(self,ipaddress='0.0.0.0',port=8889):
+    def __init__(self,ipaddress='0.0.0.0',port=8889,backlog=BACKLOG,max_clients=MAX_CLIENTS,backend='pool'):
         self.ipinfo=(ipaddress,port)
-        self.the_clients = []
+        self.backlog = backlog
+        self.max_clients = max_clients
+        self.backend = backend
         self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         threading.Thread.__init__(self)
@@ -44,18 +53,26 @@ class Server(threading.Thread):
     def run(self):
         logging.warning(f"server berjalan di ip address {self.ipinfo}")
         self.my_socket.bind(self.ipinfo)
-        self.my_socket.listen(1)
-        while True:
-            self.connection, self.client_address = self.my_socket.accept()
-            logging.warning(f"connection from {self.client_address}")
-
-            clt = ProcessTheClient(self.connection, self.client_address)
-            clt.start()
-            self.the_clients.append(clt)
+        self.my_socket.listen(self.backlog)
+        # operasi file dijalankan di executor pada backend asyncio
+        serve(self.backend, self.my_socket, ProcessTheClient, max_clients=self.max_clients, max_pending=0,
+              busy_reply=busy_reply, offload=True)
 
 def main():
-    svr = Server(ipaddress='0.0.0.0',port=6666)
+    import argparse
+    parser = argparse.ArgumentParser(description='File Server')
+    parser.add_argument('--port', type=int, default=6666, help='Server port (default: 6666)')
+    parser.add_argument('--backend', choices=BACKENDS, default='pool',
+                        help='Concurrency backend: thread pool, selector event loop or asyncio (default: pool)')
+    parser.add_argument('--backlog', type=int, default=BACKLOG, help=f'Listen backlog (default: {BACKLOG})')
+    parser.add_argument('--max-clients', type=int, default=MAX_CLIENTS,
+                        help=f'Connections served at once before new ones get BUSY (default: {MAX_CLIENTS})')
+    args = parser.parse_args()
+    svr = Server(ipaddress='0.0.0.0',port=args.port,backlog=args.backlog,max_clients=args.max_clients,
+                 backend=args.backend)
     svr.start()
+    # executor di thread server tidak bisa dibuat lagi jika main thread sudah selesai
+    svr.join()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,18 +4,29 @@ import json
 import logging
 import ssl
 import os
-import base64
+import gzip
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from urllib.parse import quote
 
 # alamat server Mesin1
 server_address = ('172.16.16.101', 50000)
+# ukuran maksimum satu recv_into saat membaca body respons
+RECV_CHUNK = 256*1024
 
 # buat header HTTP
 ip_addr = socket.gethostbyname(socket.gethostname())
-Header = f""" HTTP/1.1
-Host: {server_address[0]}
-User-Agent: {ip_addr}
-Accept: */*
-"""
+Header = (f" HTTP/1.1\r\n"
+          f"Host: {server_address[0]}\r\n"
+          f"User-Agent: {ip_addr}\r\n"
+          "Accept: */*\r\n"
+          "Accept-Encoding: gzip\r\n")
+
+# koneksi yang dipakai ulang antar request (keep-alive)
+persistent_sock = None
+
+# hasil /list terakhir beserta ETag-nya, dipakai lagi jika server membalas 304
+list_cache = {}
 
 def make_socket(destination_address='172.16.16.101', port=50000):
     try:
@@ -43,30 +54,79 @@ def make_secure_socket(destination_address='localhost', port=50000):
     except Exception as ee:
         logging.warning(f"error {str(ee)}")
 
-def send_command(command_str, is_secure=False):
+def send_command(command_str, is_secure=False, body_file=None):
+    global persistent_sock
     alamat_server = server_address[0]
     port_server = server_address[1]
-    if is_secure:
-        sock = make_secure_socket(alamat_server, port_server)
-    else:
-        sock = make_socket(alamat_server, port_server)
 
-    try:
+    # request tanpa body diakhiri baris kosong; request dengan body sudah lengkap
+    # sesuai Content-Length, byte tambahan akan terbaca sebagai request berikutnya
+    if "\r\n\r\n" not in command_str:
         command_str += "\r\n"
-        sock.sendall(command_str.encode())
-        data_received = "" 
-        while True:
-            data = sock.recv(2048)
-            if data:
-                data_received += data.decode()
-                if "\r\n\r\n" in data_received:
-                    break
+    request = command_str.encode()
+    # koneksi lama bisa saja sudah ditutup server (idle timeout), jadi dicoba sekali lagi dengan koneksi baru
+    for attempt in range(2):
+        reused = persistent_sock is not None
+        if not reused:
+            if is_secure:
+                persistent_sock = make_secure_socket(alamat_server, port_server)
             else:
-                break
-        return data_received
-    except Exception as ee:
-        logging.warning(f"error during data receiving {str(ee)}")
-        return False
+                persistent_sock = make_socket(alamat_server, port_server)
+        sock = persistent_sock
+        try:
+            sock.sendall(request)
+            if body_file is not None:
+                # body dikirim langsung dari file, tanpa dibaca ke memori
+                body_file.seek(0)
+                sock.sendfile(body_file)
+            response, keep_alive = read_response(sock)
+            if not keep_alive:
+                sock.close()
+                persistent_sock = None
+            return response
+        except Exception as ee:
+            sock.close()
+            persistent_sock = None
+            if reused and attempt == 0:
+                continue
+            logging.warning(f"error during data receiving {str(ee)}")
+            return False
+
+def read_response(sock):
+    # membaca header sampai \r\n\r\n lalu body sepanjang Content-Length
+    data_received = b""
+    while b"\r\n\r\n" not in data_received:
+        data = sock.recv(65536)
+        if not data:
+            raise ConnectionError("connection closed by server")
+        data_received += data
+    headers, body = data_received.split(b"\r\n\r\n", 1)
+    content_length = 0
+    keep_alive = False
+    content_encoding = None
+    for line in headers.decode('latin-1').split("\r\n")[1:]:
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'content-length':
+            content_length = int(value.strip())
+        elif name.strip().lower() == 'connection':
+            keep_alive = value.strip().lower() == 'keep-alive'
+        elif name.strip().lower() == 'content-encoding':
+            content_encoding = value.strip().lower()
+    # body ditampung di buffer seukuran Content-Length dan diisi langsung dengan recv_into,
+    # tanpa menyambung bytes berulang kali
+    buf = bytearray(content_length)
+    received = min(len(body), content_length)
+    buf[:received] = body[:received]
+    with memoryview(buf) as view:
+        while received < content_length:
+            n = sock.recv_into(view[received:], min(RECV_CHUNK, content_length - received))
+            if not n:
+                raise ConnectionError("connection closed by server")
+            received += n
+    body = buf
+    if content_encoding == 'gzip':
+        body = gzip.decompress(body)
+    return (headers + b"\r\n\r\n" + body).decode(errors='replace'), keep_alive
 
 def parse_http_response(response: str):
     try:
@@ -79,15 +139,22 @@ def parse_http_response(response: str):
         return None, None
 
 def list_dir():
-    response = send_command(f"GET /list{Header}")
+    if_none_match = f"If-None-Match: {list_cache['etag']}\r\n" if 'etag' in list_cache else ""
+    response = send_command(f"GET /list{Header}{if_none_match}")
     status_code, body = parse_http_response(response)
-    if status_code != 200:
+    if status_code == 304:
+        body = list_cache['body']
+    elif status_code != 200:
         return f"Failed to get server directory: HTTP {status_code}"
     try:
-        body = response.split("\r\n\r\n", 1)[1].strip()
+        body = body.strip()
         dir = json.loads(body)
     except (IndexError, json.JSONDecodeError) as e:
         return f"Failed to parse JSON: {e}\nResponse:\n{repr(response)}"
+    for line in response.split("\r\n\r\n", 1)[0].split("\r\n")[1:]:
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'etag':
+            list_cache.update(etag=value.strip(), body=body)
     dirList = "Server Directory:\n"
     for file in dir['files']:
         dirList += f"- File: {file['name']}, Size: {file['size']} bytes\n"
@@ -98,18 +165,17 @@ def upload_file(filepath, host='localhost'):
         print(f"Error: File not found: {filepath}")
         return
     filename = os.path.basename(filepath)
+    # isi file dikirim apa adanya (application/octet-stream), tanpa base64/JSON
     with open(filepath, 'rb') as f:
-        content = base64.b64encode(f.read()).decode()
-    data = json.dumps({'filename': filename, 'content': content})
-    request = (
-        f"POST /upload HTTP/1.1\r\n"
-        f"Host: {host}\r\n"
-        "Content-Type: application/json\r\n"
-        f"Content-Length: {len(data)}\r\n"
-        "\r\n"
-        f"{data}"
-    )
-    response = send_command(request)
+        size = os.fstat(f.fileno()).st_size
+        request = (
+            f"POST /upload/{quote(filename)} HTTP/1.1\r\n"
+            f"Host: {host}\r\n"
+            "Content-Type: application/octet-stream\r\n"
+            f"Content-Length: {size}\r\n"
+            "\r\n"
+        )
+        response = send_command(request, body_file=f)
     status_code, body = parse_http_response(response)
     return f"Upload status: HTTP {status_code}\nResponse body: {body}"
 
@@ -118,6 +184,125 @@ def delete_file(filepath, host='localhost'):
     status_code, body = parse_http_response(response)
     return f"Delete status: HTTP {status_code}\nResponse body: {body}"
 
+def request_range(filepath, awal, akhir, if_range=None):
+    # koneksi baru per range; mengembalikan socket, status, header dan awal body
+    sock = make_socket(server_address[0], server_address[1])
+    request = (
+        f"GET /{quote(filepath)} HTTP/1.1\r\n"
+        f"Host: {server_address[0]}\r\n"
+        f"Range: bytes={awal}-{akhir}\r\n"
+        + (f"If-Range: {if_range}\r\n" if if_range else "")
+        + "Connection: close\r\n"
+        "\r\n"
+    )
+    sock.sendall(request.encode())
+    data_received = b""
+    while b"\r\n\r\n" not in data_received:
+        data = sock.recv(65536)
+        if not data:
+            sock.close()
+            raise ConnectionError("connection closed by server")
+        data_received += data
+    head, rest = data_received.split(b"\r\n\r\n", 1)
+    lines = head.decode('latin-1').split("\r\n")
+    status_code = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return sock, status_code, headers, rest
+
+def download_segment(filepath, fd, segment, validator):
+    # segment = [awal, akhir, sudah_diterima], diperbarui selama download
+    awal, akhir, done = segment
+    sock, status_code, headers, data = request_range(filepath, awal + done, akhir, validator)
+    try:
+        if status_code != 206:
+            raise RuntimeError(f"file changed on server (HTTP {status_code})")
+        while True:
+            if data:
+                data = data[:akhir - awal + 1 - segment[2]]
+                os.pwrite(fd, data, awal + segment[2])
+                segment[2] += len(data)
+            if segment[2] >= akhir - awal + 1:
+                return
+            data = sock.recv(1024*1024)
+            if not data:
+                raise ConnectionError("connection closed by server")
+    finally:
+        sock.close()
+
+def download_file(filepath, dest=None, connections=4):
+    """
+    mengunduh filepath (misalnya files/rfc2616.pdf) lewat beberapa koneksi
+    paralel, masing-masing meminta satu range. Progress disimpan di
+    <dest>.part.json sehingga download yang terputus bisa dilanjutkan dengan
+    memanggil fungsi ini lagi; If-Range memastikan potongan lama tidak
+    digabung dengan isi file yang sudah berubah di server
+    """
+    dest = dest or os.path.basename(filepath)
+    part_path = dest + '.part'
+    state_path = part_path + '.json'
+
+    sock, status_code, headers, _ = request_range(filepath, 0, 0)
+    sock.close()
+    if status_code == 416:
+        size = 0
+    elif status_code == 206:
+        size = int(headers['content-range'].rsplit('/', 1)[1])
+    else:
+        return f"Download failed: HTTP {status_code}"
+    # ETag (mtime dalam ns dan ukuran) lebih tepat dari Last-Modified yang hanya
+    # sampai detik; ETag lemah (W/) tidak boleh dipakai untuk If-Range
+    validator = headers.get('etag')
+    if not validator or validator.startswith('W/'):
+        validator = headers.get('last-modified')
+
+    state = None
+    if os.path.exists(state_path) and os.path.exists(part_path):
+        with open(state_path) as f:
+            state = json.load(f)
+        if state['size'] != size or state['validator'] != validator:
+            state = None
+    if state is None:
+        seg_size = max(1, -(-size // connections))
+        segments = [[awal, min(awal + seg_size, size) - 1, 0] for awal in range(0, size, seg_size)]
+        state = dict(size=size, validator=validator, segments=segments)
+        with open(part_path, 'wb') as f:
+            f.truncate(size)
+
+    def save_state():
+        with open(state_path, 'w') as f:
+            json.dump(state, f)
+
+    fd = os.open(part_path, os.O_WRONLY)
+    start = time.time()
+    try:
+        todo = [seg for seg in state['segments'] if seg[2] < seg[1] - seg[0] + 1]
+        with ThreadPoolExecutor(max(1, len(todo))) as executor:
+            futures = [executor.submit(download_segment, filepath, fd, seg, validator) for seg in todo]
+            pending = futures
+            while pending:
+                done, pending = wait(pending, timeout=1, return_when=FIRST_EXCEPTION)
+                save_state()
+                for future in done:
+                    if future.exception() is not None:
+                        raise future.exception()
+    except Exception as ee:
+        save_state()
+        if isinstance(ee, RuntimeError):
+            # isi file di server berubah, download berikutnya mulai dari awal
+            os.remove(state_path)
+        return f"Download interrupted: {ee}, run again to resume"
+    finally:
+        os.close(fd)
+
+    os.replace(part_path, dest)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    durasi = time.time() - start
+    return f"Downloaded {filepath} ({size} bytes) in {durasi:.2f}s using {len(state['segments'])} connections"
+
 if __name__ == '__main__':
     print("\n=== List all files on the server ===")
     print(list_dir())
@@ -128,6 +313,9 @@ if __name__ == '__main__':
     print("\n=== List all files again ===")
     print(list_dir())
 
+    print("\n=== Download file 'testing.txt' with parallel range requests ===")
+    print(download_file('files/testing.txt', dest='testing_download.txt'))
+
     print("\n=== Delete file 'testing.txt' ===")
     print(delete_file('testing.txt'))
 
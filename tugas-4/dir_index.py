@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+"""
+* DirectoryIndex menyimpan daftar file di satu direktori di memori
+(nama -> size, mtime, content_type), sehingga LIST tidak perlu glob/stat
+seluruh direktori di setiap request
+
+* upload/delete memperbarui index secara langsung lewat update/remove.
+Perubahan dari luar server (process lain, copy manual) ditangkap oleh
+reconcile: mtime direktori dicek paling sering sekali per reconcile_interval
+detik, dan direktori di-scan ulang hanya jika mtime-nya berubah (ditambah
+scan penuh berkala untuk perubahan isi file yang tidak mengubah mtime
+direktori)
+
+* hasil serialisasi (misalnya JSON untuk LIST) disimpan dan baru dibuat
+ulang setelah index berubah
+"""
+
+
+class DirectoryIndex:
+    def __init__(self, path='.', name_filter=None, content_types=None,
+                 reconcile_interval=1.0, full_rescan_interval=60.0):
+        self.path = path
+        self.name_filter = name_filter or (lambda name: not name.startswith('.'))
+        self.content_types = content_types or {}
+        self.reconcile_interval = reconcile_interval
+        self.full_rescan_interval = full_rescan_interval
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.serialized = {}
+        self.dir_mtime = None
+        self.last_check = 0
+        self.last_full = 0
+        self.rescan()
+
+    def rescan(self):
+        now = time.monotonic()
+        dir_mtime = os.stat(self.path).st_mtime_ns
+        entries = {}
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if not self.name_filter(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    entries[entry.name] = self._entry(entry.name, entry.stat())
+                except OSError:
+                    continue
+        with self.lock:
+            self.entries = entries
+            self.serialized.clear()
+            self.dir_mtime = dir_mtime
+            self.last_check = self.last_full = now
+
+    def reconcile(self):
+        now = time.monotonic()
+        if now - self.last_check < self.reconcile_interval:
+            return
+        self.last_check = now
+        try:
+            dir_mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if dir_mtime != self.dir_mtime or now - self.last_full >= self.full_rescan_interval:
+            self.rescan()
+
+    def _entry(self, name, st):
+        content_type = self.content_types.get(os.path.splitext(name)[1], 'application/octet-stream')
+        return dict(size=st.st_size, mtime=st.st_mtime, content_type=content_type)
+
+    def update(self, name):
+        # dipanggil setelah file ditulis, name relatif terhadap direktori index
+        if os.path.dirname(name) or not self.name_filter(name):
+            return
+        try:
+            st = os.stat(os.path.join(self.path, name))
+        except OSError:
+            self.remove(name)
+            return
+        with self.lock:
+            self.entries[name] = self._entry(name, st)
+            self.serialized.clear()
+
+    def remove(self, name):
+        with self.lock:
+            if self.entries.pop(name, None) is not None:
+                self.serialized.clear()
+
+    def names(self):
+        self.reconcile()
+        with self.lock:
+            return sorted(self.entries)
+
+    def contains(self, name):
+        self.reconcile()
+        with self.lock:
+            return name in self.entries
+
+    def get_serialized(self, key, builder):
+        # builder(entries) hanya dipanggil jika index berubah sejak pemanggilan terakhir
+        self.reconcile()
+        with self.lock:
+            value = self.serialized.get(key)
+            if value is None:
+                value = self.serialized[key] = builder(self.entries)
+            return value
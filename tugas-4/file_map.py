@@ -0,0 +1,141 @@
+import os
+import mmap
+import time
+import threading
+from collections import OrderedDict
+
+"""
+* MmapCache memetakan file ke memori (mmap) sekali, lalu mapping yang sama
+dipakai bersama oleh semua request dan thread. Isi file dibaca langsung
+dari page cache lewat memoryview, tanpa fp.read() yang menyalin seluruh
+file ke bytes baru di setiap request
+
+* setiap get() mencocokkan inode, mtime dan ukuran file dengan mapping yang
+ada; jika berbeda file dipetakan ulang. Mapping lama tidak ditutup secara
+eksplisit, melainkan dilepas oleh garbage collector setelah request
+terakhir yang memakainya selesai
+
+* upload selalu menulis ke file sementara lalu os.replace, sehingga mapping
+lama tetap menunjuk ke isi file lama. File yang dipotong (truncate) di
+tempat oleh program lain saat sedang dipetakan akan menyebabkan SIGBUS
+
+* jumlah file (setiap mapping menahan satu fd hasil dup) dan total ukuran
+yang dipetakan dibatasi max_files dan max_bytes; yang paling lama tidak
+dipakai dilepas lebih dulu. File yang lebih besar dari max_bytes tetap
+di-mmap, tetapi tidak disimpan sehingga dilepas setelah request selesai.
+Mapping hanya memakai address space, halaman file tetap milik page cache
+dan dipakai bersama oleh semua process
+
+* paling sering sekali per sweep_interval detik semua entry diperiksa:
+file yang sudah dihapus atau diganti dari luar server dilepas, agar tidak
+tertahan di disk sampai tergusur dari cache
+"""
+
+EMPTY = memoryview(b'')
+
+
+class MappedFile:
+    def __init__(self, path, mtime_ns, size, mapping=None, inode=None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        # (st_dev, st_ino): file yang diganti (os.replace) atau dihapus lalu dibuat ulang
+        # bisa punya mtime dan ukuran yang sama, tetapi inode-nya berbeda
+        self.inode = inode
+        self.mapping = mapping
+        # file kosong tidak bisa di-mmap
+        self.view = memoryview(mapping) if mapping is not None else EMPTY
+
+    def __len__(self):
+        return self.size
+
+    def matches(self, st):
+        return (self.inode, self.mtime_ns, self.size) == ((st.st_dev, st.st_ino), st.st_mtime_ns, st.st_size)
+
+    def chunks(self, chunk_size, offset=0, length=None):
+        # potongan memoryview, tidak ada isi file yang disalin
+        end = self.size if length is None else min(self.size, offset + length)
+        for start in range(offset, end, chunk_size):
+            yield self.view[start:min(start + chunk_size, end)]
+
+    def close(self):
+        # mapping dipakai bersama, dilepas oleh MmapCache/garbage collector
+        pass
+
+
+def map_file(path):
+    with open(path, 'rb') as fp:
+        st = os.fstat(fp.fileno())
+        mapping = None
+        if st.st_size > 0:
+            mapping = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    return MappedFile(path, st.st_mtime_ns, st.st_size, mapping, (st.st_dev, st.st_ino))
+
+
+class MmapCache:
+    def __init__(self, max_files=256, max_bytes=1024*1024*1024, sweep_interval=1.0):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.remaps = 0
+        self.next_sweep = 0
+
+    def get(self, filename):
+        path = os.path.abspath(filename)
+        st = os.stat(path)
+        with self.lock:
+            self._sweep()
+            mapped = self.entries.get(path)
+            if mapped is not None and mapped.matches(st):
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return mapped
+            # dipetakan di dalam lock agar request bersamaan tidak membuat mapping sendiri-sendiri
+            mapped = map_file(path)
+            self.remaps += 1
+            self._drop(path)
+            if mapped.size <= self.max_bytes:
+                self.entries[path] = mapped
+                self.size += mapped.size
+                while len(self.entries) > self.max_files or self.size > self.max_bytes:
+                    _, evicted = self.entries.popitem(last=False)
+                    self.size -= evicted.size
+            return mapped
+
+    def _drop(self, path):
+        old = self.entries.pop(path, None)
+        if old is not None:
+            self.size -= old.size
+
+    def _sweep(self):
+        # dipanggil dengan lock dipegang
+        now = time.monotonic()
+        if now < self.next_sweep:
+            return
+        self.next_sweep = now + self.sweep_interval
+        for path, mapped in list(self.entries.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                self._drop(path)
+                continue
+            if not mapped.matches(st):
+                self._drop(path)
+
+    def invalidate(self, filename):
+        with self.lock:
+            self._drop(os.path.abspath(filename))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            return dict(hits=self.hits, maps=self.remaps, files=len(self.entries),
+                        mapped_bytes=self.size, max_files=self.max_files, max_bytes=self.max_bytes)
@@ -1,14 +1,369 @@
 import sys
 import os.path
+import re
 import uuid
 import json
 import base64
-from glob import glob
+import gzip
+import zlib
+import hashlib
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from file_cache import LRUCache, file_key
+from file_map import MmapCache
+from dir_index import DirectoryIndex
+
+try:
+    import zstandard
+except ImportError:
+    # zstd opsional, tanpa modul ini hanya gzip yang ditawarkan
+    zstandard = None
+
+# urutan preferensi jika client menerima beberapa encoding dengan q yang sama
+ENCODINGS = ('zstd', 'gzip') if zstandard is not None else ('gzip',)
+
+
+class HttpRequest:
+    # request yang sudah di-parse; headers berupa list baris "Nama: nilai"
+    # seperti sebelumnya, body selalu bytes
+    def __init__(self, method, object_address, version='HTTP/1.0', headers=[], body=b''):
+        self.method = method
+        self.object_address = object_address
+        self.version = version
+        self.headers = list(headers)
+        self.body = body
+        # writer dari HttpServer.upload_writer jika body langsung ditulis ke disk
+        self.upload = None
+
+    def header(self, name, default=None):
+        return get_header(self.headers, name, default)
+
+
+def get_header(headers, name, default=None):
+    name = name.lower()
+    for line in headers:
+        kk, _, v = line.partition(':')
+        if kk.strip().lower() == name:
+            return v.strip()
+    return default
+
+
+class UploadWriter:
+    """
+    menulis file upload secara bertahap ke file sementara (diawali titik agar
+    tidak ikut muncul di /list), lalu dipindah ke nama aslinya dengan
+    os.replace sehingga client lain tidak pernah melihat file yang setengah jadi
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        dirname, basename = os.path.split(filename)
+        self.tmp_path = os.path.join(dirname, f".{basename}.{uuid.uuid4().hex}.part")
+        fd = os.open(self.tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        self.fp = os.fdopen(fd, 'wb')
+        self.size = 0
+
+    def write(self, data):
+        self.fp.write(data)
+        self.size += len(data)
+
+    def commit(self):
+        # mengembalikan daftar file yang tersimpan
+        try:
+            self.fp.close()
+            os.replace(self.tmp_path, self.filename)
+        except Exception:
+            self.abort()
+            raise
+        return [self.filename]
+
+    def abort(self):
+        self.fp.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+class MultipartUploadWriter:
+    """
+    parser multipart/form-data yang menerima body sepotong demi sepotong.
+    Setiap part yang memiliki filename ditulis ke UploadWriter sendiri, field
+    biasa diabaikan. Hanya len(delimiter)-1 byte terakhir yang ditahan di
+    memori selama mencari boundary berikutnya
+    """
+    MAX_PART_HEADER = 16*1024
+
+    def __init__(self, file_dir, boundary):
+        self.file_dir = file_dir
+        self.delimiter = b"\r\n--" + boundary
+        # CRLF di depan agar boundary pertama cocok dengan bentuk delimiter
+        self.buffer = bytearray(b"\r\n")
+        self.state = 'preamble'
+        self.current = None
+        self.writers = []
+        self.size = 0
+
+    def write(self, data):
+        self.buffer += data
+        self.size += len(data)
+        while True:
+            if self.state in ('preamble', 'data'):
+                i = self.buffer.find(self.delimiter)
+                if i < 0:
+                    n = len(self.buffer) - (len(self.delimiter) - 1)
+                    if n > 0:
+                        if self.current is not None:
+                            self.current.write(self.buffer[:n])
+                        del self.buffer[:n]
+                    return
+                if self.current is not None:
+                    self.current.write(self.buffer[:i])
+                    self.current = None
+                del self.buffer[:i + len(self.delimiter)]
+                self.state = 'boundary'
+
+            elif self.state == 'boundary':
+                if len(self.buffer) < 2:
+                    return
+                penanda = bytes(self.buffer[:2])
+                del self.buffer[:2]
+                if penanda == b"--":
+                    self.state = 'end'
+                elif penanda == b"\r\n":
+                    self.state = 'headers'
+                else:
+                    raise ValueError('invalid multipart boundary')
+
+            elif self.state == 'headers':
+                j = self.buffer.find(b"\r\n\r\n")
+                if j < 0:
+                    if len(self.buffer) > self.MAX_PART_HEADER:
+                        raise ValueError('multipart part header too large')
+                    return
+                part_headers = bytes(self.buffer[:j]).decode('utf-8', 'replace').split("\r\n")
+                del self.buffer[:j + 4]
+                filename = multipart_filename(get_header(part_headers, 'Content-Disposition', ''))
+                if filename:
+                    self.current = UploadWriter(os.path.join(self.file_dir, filename))
+                    self.writers.append(self.current)
+                self.state = 'data'
+
+            else:
+                # epilog setelah boundary penutup diabaikan
+                self.buffer.clear()
+                return
+
+    def commit(self):
+        if self.state != 'end':
+            self.abort()
+            raise ValueError('incomplete multipart body')
+        saved = []
+        try:
+            for writer in self.writers:
+                saved += writer.commit()
+        except Exception:
+            self.abort()
+            raise
+        return saved
+
+    def abort(self):
+        for writer in self.writers:
+            writer.abort()
+
+
+def multipart_filename(disposition):
+    # filename dari Content-Disposition, tanpa komponen direktori
+    match = re.search(r'filename="([^"]*)"', disposition) or re.search(r'filename=([^;\s]+)', disposition)
+    if not match:
+        return None
+    return safe_filename(match.group(1))
+
+
+def http_date(timestamp):
+    return formatdate(timestamp, usegmt=True)
+
+
+def etag_matches(value, etag):
+    # If-None-Match / If-Range bisa berisi beberapa tag atau "*", perbandingan weak (tanpa W/)
+    if value.strip() == '*':
+        return True
+    tags = [tag.strip() for tag in value.split(',')]
+    return etag in [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+
+
+def not_modified(request_headers, etag, mtime=None):
+    """
+    True jika salinan client masih sama: If-None-Match dibandingkan dengan
+    etag, dan hanya jika header itu tidak ada If-Modified-Since dibandingkan
+    dengan mtime (dalam detik, sesuai presisi HTTP-date)
+    """
+    if_none_match = get_header(request_headers, 'If-None-Match')
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = get_header(request_headers, 'If-Modified-Since')
+    if if_modified_since is None or mtime is None:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def accept_encoding(value):
+    # encoding terbaik dari header Accept-Encoding, None jika tidak ada yang cocok
+    if not value:
+        return None
+    pilihan = {}
+    for item in value.split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        pilihan[name.strip().lower()] = q
+    kandidat = [(pilihan.get(enc, pilihan.get('*', 0.0)), -i, enc) for i, enc in enumerate(ENCODINGS)]
+    q, _, encoding = max(kandidat)
+    return encoding if q > 0 else None
+
+
+def compress(data, encoding):
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def compress_stream(src, dst, encoding, chunk_size=1024*1024):
+    # seperti compress, tetapi file dibaca dan hasilnya ditulis sepotong demi sepotong
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    else:
+        # wbits 31: format gzip, sama dengan gzip.compress
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in iter(lambda: src.read(chunk_size), b''):
+        dst.write(compressor.compress(chunk))
+    dst.write(compressor.flush())
+
+
+def parse_range(value, size):
+    """
+    Range "bytes=awal-akhir", "bytes=awal-" atau "bytes=-n" menjadi
+    (awal, akhir) inklusif. None berarti header diabaikan dan file dikirim
+    utuh (termasuk permintaan multi-range), False berarti range tidak bisa
+    dipenuhi (416)
+    """
+    if not value or not value.strip().lower().startswith('bytes='):
+        return None
+    specs = value.strip()[6:].split(',')
+    if len(specs) != 1:
+        return None
+    awal, sep, akhir = specs[0].strip().partition('-')
+    try:
+        if not sep:
+            return None
+        if awal == '':
+            n = int(akhir)
+            if n <= 0 or size == 0:
+                return False
+            return (max(0, size - n), size - 1)
+        awal = int(awal)
+        akhir = int(akhir) if akhir != '' else size - 1
+    except ValueError:
+        return None
+    if awal < 0:
+        return None
+    if awal >= size:
+        return False
+    if akhir < awal:
+        return None
+    return (awal, min(akhir, size - 1))
+
+
+def safe_filename(filename):
+    filename = os.path.basename(filename.replace('\\', '/'))
+    if filename in ('', '.', '..') or filename.startswith('.'):
+        return None
+    return filename
+
+
+class HttpResponse:
+    # header Connection baru ditentukan saat respons dikirim, karena bergantung
+    # pada koneksi (keep-alive atau close), bukan pada isi respons.
+    # messagebody boleh berupa memoryview (potongan mapping file, lihat file_map.py).
+    # Jika fileobj diberikan, body dikirim langsung dari file dengan sendfile,
+    # mulai dari offset sepanjang size byte
+    def __init__(self, kode=404, message='Not Found', messagebody=bytes(), headers={}, fileobj=None, offset=0, size=0):
+        if isinstance(messagebody, str):
+            messagebody = messagebody.encode()
+        self.kode = kode
+        self.message = message
+        self.body = messagebody
+        self.headers = dict(headers)
+        self.fileobj = fileobj
+        self.offset = offset
+        self.size = size if fileobj is not None else len(messagebody)
+
+    def head(self, keep_alive=False):
+        tanggal = datetime.now().strftime('%c')
+        resp = []
+        resp.append(f"HTTP/1.1 {self.kode} {self.message}\r\n")
+        resp.append(f"Date: {tanggal}\r\n")
+        resp.append("Connection: keep-alive\r\n" if keep_alive else "Connection: close\r\n")
+        resp.append("Server: myserver/1.1\r\n")
+        if self.kode != 304:
+            # 304 tidak punya body, Content-Length di sini harus sama dengan respons 200
+            # sehingga lebih aman tidak dikirim
+            resp.append(f"Content-Length: {self.size}\r\n")
+
+        for kk in self.headers:
+            resp.append(f"{kk}:{self.headers[kk]}\r\n")
+
+        resp.append("\r\n")
+        return ''.join(resp).encode()
+
+    def to_bytes(self, keep_alive=False):
+        if self.fileobj is not None:
+            try:
+                self.fileobj.seek(self.offset)
+                return self.head(keep_alive) + self.fileobj.read(self.size)
+            finally:
+                self.close()
+        return self.head(keep_alive) + self.body
+
+    def send(self, connection, keep_alive=False):
+        head = self.head(keep_alive)
+        if self.fileobj is not None:
+            try:
+                connection.sendall(head)
+                if self.size:
+                    connection.sendfile(self.fileobj, self.offset, self.size)
+            finally:
+                self.close()
+        elif len(self.body) < 65536:
+            # header dan body kecil dikirim dalam satu segmen
+            connection.sendall(head + self.body)
+        else:
+            connection.sendall(head)
+            connection.sendall(self.body)
+
+    def close(self):
+        if self.fileobj is not None:
+            self.fileobj.close()
+            self.fileobj = None
 
 
 class HttpServer:
-    def __init__(self):
+    # file yang lebih besar dari ini tidak di-mmap/di-cache, tetapi dikirim dengan sendfile
+    STREAM_THRESHOLD = 1024*1024
+    # respons lebih kecil dari ini tidak dikompres, hasilnya tidak sebanding dengan CPU-nya
+    MIN_COMPRESS_SIZE = 1024
+    COMPRESSIBLE = ('text/', 'application/json')
+
+    def __init__(self, cache_bytes=256*1024*1024):
         self.sessions = {}
         self.types = {
             '.pdf': 'application/pdf',
@@ -18,13 +373,28 @@ class HttpServer:
         }
         self.file_dir = './files'
         os.makedirs(self.file_dir, exist_ok=True)
+        # cache hasil kompresi file yang sering diminta, lihat file_cache.py
+        self.cache = LRUCache(cache_bytes, max_entry_bytes=self.STREAM_THRESHOLD)
+        # isi file tanpa kompresi dikirim dari mapping yang dipakai bersama, lihat file_map.py
+        self.maps = MmapCache()
+        # index isi direktori untuk /list, lihat dir_index.py
+        self.index = DirectoryIndex(self.file_dir, content_types=self.types)
+        # salinan terkompresi file besar (lihat compressed_file), direktori tersembunyi
+        # sehingga tidak muncul di /list dan tidak bisa diminta lewat /files/
+        self.compressed_dir = os.path.join(self.file_dir, '.compressed')
+        os.makedirs(self.compressed_dir, exist_ok=True)
 
     # Function to upload file
     def upload_file(self, filename, content_b64):
         try:
             file_data = base64.b64decode(content_b64)
-            with open(os.path.join(self.file_dir, filename), 'wb') as f:
-                f.write(file_data)
+            # ditulis lewat file sementara: file yang sedang di-mmap tidak boleh dipotong di tempat
+            writer = UploadWriter(os.path.join(self.file_dir, filename))
+            writer.write(file_data)
+            writer.commit()
+            self.cache.invalidate(os.path.join(self.file_dir, filename))
+            self.maps.invalidate(os.path.join(self.file_dir, filename))
+            self.index.update(filename)
             return True
         except:
             return False
@@ -33,62 +403,86 @@ class HttpServer:
     def delete_file(self, filename):
         try:
             os.remove(os.path.join(self.file_dir, filename))
+            self.cache.invalidate(os.path.join(self.file_dir, filename))
+            self.maps.invalidate(os.path.join(self.file_dir, filename))
+            self.index.remove(filename)
+            self.drop_compressed(filename)
             return True
         except:
             return False
 
-    def response(self, kode=404, message='Not Found', messagebody=bytes(), headers={}):
-        tanggal = datetime.now().strftime('%c')
-        resp = []
-        resp.append(f"HTTP/1.1 {kode} {message}\r\n")
-        resp.append(f"Date: {tanggal}\r\n")
-        resp.append("Connection: close\r\n")
-        resp.append("Server: myserver/1.1\r\n")
-        resp.append(f"Content-Length: {len(messagebody)}\r\n")
-
-        for kk in headers:
-            resp.append(f"{kk}:{headers[kk]}\r\n")
-
-        resp.append("\r\n")
-
-        response_headers = ''.join(resp)
-
-        if not isinstance(messagebody, bytes):
-            messagebody = messagebody.encode()
+    def upload_writer(self, request):
+        # dipanggil RequestParser begitu header request selesai dibaca: body
+        # application/octet-stream dan multipart/form-data langsung ditulis ke
+        # disk. None berarti body dibaca ke memori seperti biasa (misalnya JSON).
+        # ValueError berarti upload ditolak sebelum body dikirim client
+        if request.method != 'POST' or not self.is_upload_path(request.object_address):
+            return None
+        content_type = request.header('Content-Type', '')
+        if content_type.startswith('application/octet-stream'):
+            filename = self.upload_filename(request)
+            if filename is None:
+                raise ValueError('Missing or invalid filename')
+            return UploadWriter(os.path.join(self.file_dir, filename))
+        if content_type.startswith('multipart/form-data'):
+            match = re.search(r'boundary="?([^";]+)"?', content_type)
+            if match is None:
+                raise ValueError('Missing boundary')
+            return MultipartUploadWriter(self.file_dir, match.group(1).encode('latin-1'))
+        return None
+
+    def is_upload_path(self, object_address):
+        path = urlsplit(object_address).path
+        return path == '/upload' or path.startswith('/upload/')
+
+    def upload_filename(self, request):
+        # nama file dari /upload/<nama>, /upload?filename=<nama> atau header X-Filename
+        url = urlsplit(request.object_address)
+        filename = unquote(url.path[len('/upload/'):]) if url.path.startswith('/upload/') else None
+        if not filename:
+            filename = parse_qs(url.query).get('filename', [None])[0]
+        if not filename:
+            filename = request.header('X-Filename')
+        if not filename:
+            return None
+        return safe_filename(filename)
 
-        return response_headers.encode() + messagebody
+    def response(self, kode=404, message='Not Found', messagebody=bytes(), headers={}):
+        return HttpResponse(kode, message, messagebody, headers)
 
     def proses(self, data):
-        print(data)
-        header_body_split = data.split("\r\n\r\n", 1)
-        header_part = header_body_split[0]
-        body = header_body_split[1] if len(header_body_split) > 1 else ""
+        # data berupa satu request utuh (str atau bytes); koneksi socket
+        # memakai RequestParser di http_connection.py lalu proses_request
+        if isinstance(data, str):
+            data = data.encode()
+        header_part, _, body = data.partition(b"\r\n\r\n")
 
-        requests = header_part.split("\r\n")
+        requests = header_part.decode('latin-1').split("\r\n")
         baris = requests[0]
         all_headers = [n for n in requests[1:] if n != '']
 
         j = baris.split(" ")
         try:
-            method = j[0].upper().strip()
-            object_address = j[1].strip()
-
-            if method == 'GET':
-                return self.http_get(object_address, all_headers)
-            elif method == 'POST':
-                return self.http_post(object_address, all_headers, body)
-            elif method == 'DELETE':
-                return self.http_delete(object_address, all_headers)
-            else:
-                return self.response(400, 'Bad Request', '', {})
+            versi = j[2].strip().upper() if len(j) > 2 else 'HTTP/1.0'
+            request = HttpRequest(j[0].upper().strip(), j[1].strip(), versi, all_headers, body)
         except IndexError:
             return self.response(400, 'Bad Request', '', {})
+        return self.proses_request(request)
+
+    def proses_request(self, request):
+        method = request.method
+        object_address = request.object_address
+        if method == 'GET':
+            return self.http_get(object_address, request.headers)
+        elif method == 'POST':
+            return self.http_post(object_address, request.headers, request.body, request.upload)
+        elif method == 'DELETE':
+            return self.http_delete(object_address, request.headers)
+        else:
+            return self.response(400, 'Bad Request', '', {})
 
     # method=='GET'
     def http_get(self, object_address, headers):
-        files = glob('./files/*')
-        thedir = './'
-
         if object_address == '/':
             return self.response(200, 'OK', 'Ini Adalah web Server percobaan', {})
         elif object_address == '/video':
@@ -96,28 +490,178 @@ class HttpServer:
         elif object_address == '/santai':
             return self.response(200, 'OK', 'santai saja', {})
         elif object_address == '/list':
-            files_list = []
-            for f in os.listdir(self.file_dir):
-                if os.path.isfile(os.path.join(self.file_dir, f)):
-                    files_list.append({'name': f, 'size': os.path.getsize(os.path.join(self.file_dir, f))})
-
-            response_data = json.dumps({'files': files_list})
+            response_data, etag = self.index.get_serialized('list', self.list_json)
+            resp_headers = {'Content-type': 'application/json', 'Vary': 'Accept-Encoding'}
+            encoding = self.choose_encoding(headers, 'application/json', len(response_data))
+            if encoding:
+                # varian terkompresi disimpan di index juga, dibuat sekali per perubahan isi direktori
+                response_data, etag = self.index.get_serialized(
+                    'list-' + encoding, lambda entries: self.list_compressed(entries, encoding))
+                resp_headers['Content-Encoding'] = encoding
+            resp_headers['ETag'] = etag
+            if not_modified(headers, etag):
+                del resp_headers['Content-type']
+                return self.response(304, 'Not Modified', '', resp_headers)
+            return self.response(200, 'OK', response_data, resp_headers)
+        elif object_address == '/cache-stats':
+            response_data = json.dumps(dict(self.cache.stats(), mmap=self.maps.stats()))
             return self.response(200, 'OK', response_data, {'Content-type': 'application/json'})
 
-        object_address = object_address[1:]
-        if thedir + object_address not in files:
+        # /files/<nama>: dicek lewat DirectoryIndex (O(1)), file yang baru dibuat dari luar
+        # server dan belum masuk index dicek dengan os.path.isfile, tanpa scan direktori
+        object_address = unquote(object_address[1:])
+        name = object_address[len('files/'):] if object_address.startswith('files/') else ''
+        if not name or safe_filename(name) != name:
             return self.response(404, 'Not Found', '', {})
+        path = os.path.join(self.file_dir, name)
+        if not (self.index.contains(name) or os.path.isfile(path)):
+            return self.response(404, 'Not Found', '', {})
+        return self.get_file(path, headers)
 
-        with open(thedir + object_address, 'rb') as fp:
-            isi = fp.read()
-
-        fext = os.path.splitext(thedir + object_address)[1]
+    def get_file(self, path, request_headers):
+        fext = os.path.splitext(path)[1]
         content_type = self.types.get(fext, 'application/octet-stream')
-        headers = {'Content-type': content_type}
-        return self.response(200, 'OK', isi, headers)
+        key = file_key(path)
+        mapped = None
+        if self.cache.fits(key[2]):
+            # key diambil dari mapping agar ETag, ukuran dan isi selalu dari versi file yang sama
+            mapped = self.maps.get(path)
+            key = (key[0], mapped.mtime_ns, mapped.size)
+        size = key[2]
+        mtime = key[1] / 1e9
+        last_modified = http_date(mtime)
+        # kompresi hanya untuk request tanpa Range; range selalu dihitung terhadap
+        # isi file asli. File kecil dikompres di memori, file besar lewat salinan di disk
+        encoding = None
+        compressed_path = None
+        if get_header(request_headers, 'Range') is None:
+            encoding = self.choose_encoding(request_headers, content_type, size)
+        if encoding and mapped is None:
+            compressed_path = self.cache.get_or_load(
+                key + (encoding, 'file'), lambda: self.compressed_file(path, key, encoding))
+            if compressed_path is None:
+                # file berubah saat akan dikompres, dikirim tanpa kompresi
+                encoding = None
+
+        # ETag dari mtime dan ukuran, tidak perlu membaca isi file; setiap
+        # encoding punya ETag sendiri
+        etag = '"%x-%x"' % (key[1], size)
+        if encoding:
+            etag = etag[:-1] + f'-{encoding}"'
+        headers = {'Content-type': content_type, 'Accept-Ranges': 'bytes',
+                   'Last-Modified': last_modified, 'ETag': etag}
+        if content_type.startswith(self.COMPRESSIBLE):
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding:
+            headers['Content-Encoding'] = encoding
+
+        if not_modified(request_headers, etag, mtime):
+            del headers['Content-type']
+            return self.response(304, 'Not Modified', '', headers)
+
+        # If-Range: range hanya dipakai jika file belum berubah sejak validator
+        # (ETag atau Last-Modified) tersebut didapat client, jika berubah file dikirim utuh
+        byte_range = parse_range(get_header(request_headers, 'Range'), size)
+        if_range = get_header(request_headers, 'If-Range')
+        if byte_range is not None and if_range is not None \
+                and if_range != last_modified and not (if_range.startswith('"') and if_range == etag):
+            byte_range = None
+        if byte_range is False:
+            return self.response(416, 'Range Not Satisfiable', '', {'Content-Range': f"bytes */{size}"})
+        if byte_range is None:
+            kode, message, awal, panjang = 200, 'OK', 0, size
+        else:
+            kode, message = 206, 'Partial Content'
+            awal, panjang = byte_range[0], byte_range[1] - byte_range[0] + 1
+            headers['Content-Range'] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+
+        if compressed_path is not None:
+            try:
+                fp = open(compressed_path, 'rb')
+            except FileNotFoundError:
+                # salinan dihapus (misalnya oleh worker lain setelah file berubah), dibuat ulang
+                self.cache.invalidate(path)
+                return self.get_file(path, request_headers)
+            return HttpResponse(kode, message, headers=headers, fileobj=fp, size=os.fstat(fp.fileno()).st_size)
+
+        if encoding:
+            # hasil kompresi di-cache per versi file (key berisi mtime dan ukuran)
+            isi = self.cache.get_or_load(key + (encoding,), lambda: compress(mapped.view, encoding))
+            return self.response(kode, message, isi, headers)
+
+        if mapped is not None:
+            # potongan memoryview dari mapping yang dipakai bersama, isi file tidak disalin
+            isi = mapped.view[awal:awal + panjang]
+            return self.response(kode, message, isi, headers)
+
+        # file besar: isi file tidak pernah dibaca ke memori
+        fp = open(path, 'rb')
+        return HttpResponse(kode, message, headers=headers, fileobj=fp, offset=awal, size=panjang)
+
+    def compressed_file(self, path, key, encoding):
+        """
+        path salinan terkompresi file besar, dibuat sekali per versi file dan
+        encoding lalu dikirim dengan sendfile seperti file biasa. Nama salinan
+        berisi mtime dan ukuran file (sama dengan ETag), ditulis lewat
+        UploadWriter sehingga aman dibuat bersamaan oleh beberapa worker process.
+        None jika file sudah berubah dari versi di key
+        """
+        name = os.path.basename(path)
+        compressed_path = os.path.join(self.compressed_dir, '%s.%x-%x.%s' % (name, key[1], key[2], encoding))
+        if os.path.exists(compressed_path):
+            return compressed_path
+        with open(path, 'rb') as src:
+            st = os.fstat(src.fileno())
+            if (st.st_mtime_ns, st.st_size) != key[1:3]:
+                return None
+            writer = UploadWriter(compressed_path)
+            try:
+                compress_stream(src, writer, encoding)
+            except Exception:
+                writer.abort()
+                raise
+            writer.commit()
+        # salinan dari versi file sebelumnya tidak dipakai lagi
+        self.drop_compressed(name, keep=compressed_path)
+        return compressed_path
+
+    def drop_compressed(self, name, keep=None):
+        pola = re.compile(re.escape(name) + r'\.[0-9a-f]+-[0-9a-f]+\.(gzip|zstd)')
+        with os.scandir(self.compressed_dir) as it:
+            for entry in it:
+                if pola.fullmatch(entry.name) and entry.path != keep:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+    def list_json(self, entries):
+        # ETag dari hash isi, sehingga sama di semua worker process dan setelah restart
+        files_list = [{'name': name, 'size': entries[name]['size']} for name in sorted(entries)]
+        data = json.dumps({'files': files_list}).encode()
+        return data, '"%s"' % hashlib.blake2b(data, digest_size=8).hexdigest()
+
+    def list_compressed(self, entries, encoding):
+        data, etag = self.list_json(entries)
+        return compress(data, encoding), etag[:-1] + f'-{encoding}"'
+
+    def choose_encoding(self, request_headers, content_type, size):
+        if not content_type.startswith(self.COMPRESSIBLE) or size < self.MIN_COMPRESS_SIZE:
+            return None
+        return accept_encoding(get_header(request_headers, 'Accept-Encoding'))
 
     # method=='POST'
-    def http_post(self, object_address, headers, body):
+    def http_post(self, object_address, headers, body, upload=None):
+        if upload is not None:
+            return self.finish_upload(upload)
+        if get_header(headers, 'Content-Type', '').startswith(('application/octet-stream', 'multipart/form-data')) \
+                and self.is_upload_path(object_address):
+            return self.response(
+                400,
+                'Bad Request',
+                json.dumps({'status': 'error', 'message': 'Missing filename or boundary'}),
+                {'Content-Type': 'application/json'}
+            )
         if object_address == '/upload':
             try:
                 data = json.loads(body)
@@ -144,6 +688,27 @@ class HttpServer:
             {'Content-Type': 'application/json'}
         )
 
+    def finish_upload(self, upload):
+        try:
+            saved = upload.commit()
+        except Exception as e:
+            return self.response(
+                400,
+                'Bad Request',
+                json.dumps({'status': 'error', 'message': str(e)}),
+                {'Content-Type': 'application/json'}
+            )
+        for path in saved:
+            self.cache.invalidate(path)
+            self.maps.invalidate(path)
+            self.index.update(os.path.basename(path))
+        return self.response(
+            200,
+            'OK',
+            json.dumps({'status': 'success', 'files': [os.path.basename(path) for path in saved]}),
+            {'Content-Type': 'application/json'}
+        )
+
     # method=='DELETE'
     def http_delete(self, object_address, headers):
         if object_address.startswith('/delete/'):
@@ -173,9 +738,9 @@ class HttpServer:
 if __name__ == "__main__":
     httpserver = HttpServer()
     d = httpserver.proses('GET testing.txt HTTP/1.0')
-    print(d)
+    print(d.to_bytes())
     d = httpserver.proses('GET donalbebek.jpg HTTP/1.0')
-    print(d)
+    print(d.to_bytes())
 import sys
 import socket
 import json
@@ -0,0 +1,261 @@
+import socket
+import logging
+
+from http import HttpRequest
+
+"""
+* ProcessTheClient dipakai bersama oleh server_thread_pool_http dan
+server_process_pool_http
+
+* koneksi tidak lagi ditutup setelah satu request: HTTP/1.1 default
+keep-alive (kecuali client mengirim "Connection: close"), HTTP/1.0 hanya
+jika client meminta "Connection: keep-alive"
+
+* request di-parse dalam bentuk bytes oleh RequestParser: header dibaca
+sampai "\\r\\n\\r\\n", lalu body dibaca tepat sepanjang Content-Length (atau
+sesuai Transfer-Encoding: chunked). Data dari socket diterima dalam
+potongan besar, dan sisa data (request berikutnya pada pipelining) tetap
+di buffer untuk request selanjutnya
+
+* jika HttpServer.upload_writer mengembalikan writer untuk sebuah request
+(upload octet-stream/multipart), body tidak ditampung di memori tetapi
+langsung diteruskan ke writer tersebut sepotong demi sepotong. Jika
+upload_writer menolak request (ValueError, misalnya nama file kosong),
+request dijawab 400 begitu header selesai dibaca, tanpa "100 Continue"
+
+* body yang ditampung di memori (misalnya JSON) dibatasi MAX_BODY_SIZE,
+baik lewat Content-Length maupun total chunk; yang lebih besar dijawab 413
+
+* koneksi ditutup jika idle lebih dari IDLE_TIMEOUT detik atau sudah
+melayani MAX_REQUESTS request
+
+* RejectTheClient menjawab koneksi yang ditolak AdmissionController dengan
+503 Service Unavailable dan Retry-After
+"""
+
+IDLE_TIMEOUT = 15
+MAX_REQUESTS = 100
+RECV_SIZE = 256*1024
+MAX_HEADER_SIZE = 64*1024
+MAX_BODY_SIZE = 16*1024*1024
+
+
+class BadRequest(ValueError):
+    status = (400, 'Bad Request')
+
+
+class PayloadTooLarge(BadRequest):
+    status = (413, 'Payload Too Large')
+
+
+class RequestParser:
+    def __init__(self, body_writer=None, max_header_size=MAX_HEADER_SIZE, max_body_size=MAX_BODY_SIZE):
+        # body_writer(request) -> writer (write/commit/abort) atau None, ValueError jika request ditolak
+        self.body_writer = body_writer
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.buffer = bytearray()
+        self.reset()
+
+    def reset(self):
+        self.request = None
+        self.scan_from = 0
+        # sisa byte body (Content-Length) atau chunk yang sedang dibaca
+        self.remaining = 0
+        self.chunked = False
+        self.chunk_state = 'size'
+        self.body = bytearray()
+        self.sink = None
+        # True jika client menunggu "100 Continue" sebelum mengirim body
+        self.expect_continue = False
+
+    def feed(self, data):
+        self.buffer += data
+
+    def next_request(self):
+        # HttpRequest yang sudah lengkap, atau None jika masih butuh data
+        if self.request is None and not self._parse_head():
+            return None
+        if self.chunked:
+            if not self._parse_chunked():
+                return None
+        elif self.remaining:
+            self._take(min(self.remaining, len(self.buffer)))
+            if self.remaining:
+                return None
+
+        request = self.request
+        request.body = bytes(self.body)
+        request.upload = self.sink
+        self.reset()
+        return request
+
+    def abort(self):
+        # koneksi putus di tengah body: file sementara milik writer dihapus
+        if self.sink is not None:
+            self.sink.abort()
+        self.reset()
+
+    def _take(self, n):
+        if self.sink is not None:
+            try:
+                with memoryview(self.buffer)[:n] as chunk:
+                    self.sink.write(chunk)
+            except ValueError as e:
+                raise BadRequest(str(e))
+        else:
+            self.body += self.buffer[:n]
+        del self.buffer[:n]
+        self.remaining -= n
+
+    def _parse_head(self):
+        # pencarian "\r\n\r\n" dilanjutkan dari posisi terakhir, tidak dari awal buffer
+        end = self.buffer.find(b"\r\n\r\n", self.scan_from)
+        if end < 0:
+            if len(self.buffer) > self.max_header_size:
+                raise BadRequest("header too large")
+            self.scan_from = max(0, len(self.buffer) - 3)
+            return False
+
+        head = bytes(self.buffer[:end]).decode('latin-1')
+        del self.buffer[:end + 4]
+        lines = head.split("\r\n")
+        # baris kosong sebelum request line diabaikan (RFC 7230 3.5)
+        while lines and lines[0] == '':
+            lines.pop(0)
+        j = lines[0].split(" ") if lines else []
+        if len(j) < 2:
+            raise BadRequest(f"invalid request line {lines[:1]}")
+        versi = j[2].strip().upper() if len(j) > 2 else 'HTTP/1.0'
+        self.request = HttpRequest(j[0].upper().strip(), j[1].strip(), versi,
+                                   [n for n in lines[1:] if n != ''])
+
+        encoding = (self.request.header('Transfer-Encoding') or '').lower()
+        if 'chunked' in encoding:
+            self.chunked = True
+        else:
+            try:
+                self.remaining = int(self.request.header('Content-Length') or 0)
+            except ValueError:
+                raise BadRequest("invalid Content-Length")
+            if self.remaining < 0:
+                raise BadRequest("invalid Content-Length")
+        has_body = self.chunked or self.remaining
+        if self.body_writer is not None:
+            # dipanggil juga untuk body kosong: upload file 0 byte tetap harus menghasilkan file
+            try:
+                self.sink = self.body_writer(self.request)
+            except ValueError as e:
+                raise BadRequest(str(e))
+        if self.sink is None and self.remaining > self.max_body_size:
+            raise PayloadTooLarge(f"body of {self.remaining} bytes is too large")
+        self.expect_continue = bool(has_body) and \
+            (self.request.header('Expect') or '').lower() == '100-continue'
+        return True
+
+    def _parse_chunked(self):
+        while True:
+            if self.chunk_state == 'data':
+                self._take(min(self.remaining, len(self.buffer)))
+                if self.remaining:
+                    return False
+                self.chunk_state = 'data-end'
+                continue
+
+            if self.chunk_state == 'data-end':
+                if len(self.buffer) < 2:
+                    return False
+                if self.buffer[:2] != b"\r\n":
+                    raise BadRequest("missing CRLF after chunk")
+                del self.buffer[:2]
+                self.chunk_state = 'size'
+                continue
+
+            end = self.buffer.find(b"\r\n")
+            if end < 0:
+                if len(self.buffer) > self.max_header_size:
+                    raise BadRequest("chunk line too long")
+                return False
+            line = bytes(self.buffer[:end])
+            del self.buffer[:end + 2]
+
+            if self.chunk_state == 'size':
+                try:
+                    size = int(line.split(b";", 1)[0].strip(), 16)
+                except ValueError:
+                    raise BadRequest("invalid chunk size")
+                if self.sink is None and len(self.body) + size > self.max_body_size:
+                    raise PayloadTooLarge("chunked body is too large")
+                if size == 0:
+                    self.chunk_state = 'trailer'
+                else:
+                    self.remaining = size
+                    self.chunk_state = 'data'
+            elif line == b"":
+                # trailer diabaikan, baris kosong menandai akhir body
+                return True
+
+
+def ProcessTheClient(connection, address, httpserver, idle_timeout=IDLE_TIMEOUT, max_requests=MAX_REQUESTS,
+                     stopping=None):
+    # stopping (threading.Event): jika di-set, koneksi ditutup setelah respons berikutnya
+    parser = RequestParser(body_writer=httpserver.upload_writer)
+    served = 0
+    try:
+        connection.settimeout(idle_timeout)
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while served < max_requests:
+            try:
+                request = parser.next_request()
+            except BadRequest as e:
+                logging.warning(f"bad request from {address}: {e}")
+                kode, message = e.status
+                httpserver.response(kode, message, f"{e}\n", {'Content-Type': 'text/plain'}).send(connection, False)
+                break
+
+            if request is None:
+                if parser.expect_continue:
+                    connection.sendall(b"HTTP/1.1 100 Continue\r\n\r\n")
+                    parser.expect_continue = False
+                data = connection.recv(RECV_SIZE)
+                if not data:
+                    break
+                parser.feed(data)
+                continue
+
+            served += 1
+            keep_alive = wants_keep_alive(request) and served < max_requests and \
+                not (stopping is not None and stopping.is_set())
+            hasil = httpserver.proses_request(request)
+            hasil.send(connection, keep_alive)
+            if not keep_alive:
+                break
+    except socket.timeout:
+        pass
+    except OSError as e:
+        logging.warning(f"error on connection {address}: {e}")
+    finally:
+        parser.abort()
+        connection.close()
+
+
+def RejectTheClient(connection, address, httpserver, retry_after=1):
+    # header request dibaca dulu (jika sempat) agar client tidak mendapat connection reset
+    head = bytearray()
+    try:
+        while b"\r\n\r\n" not in head and len(head) < MAX_HEADER_SIZE:
+            data = connection.recv(RECV_SIZE)
+            if not data:
+                break
+            head += data
+    except socket.timeout:
+        pass
+    headers = {'Retry-After': str(retry_after), 'Content-Type': 'text/plain'}
+    httpserver.response(503, 'Service Unavailable', 'server busy\n', headers).send(connection, False)
+
+
+def wants_keep_alive(request):
+    connection = (request.header('Connection') or '').lower()
+    if request.version == 'HTTP/1.1':
+        return connection != 'close'
+    return connection == 'keep-alive'
@@ -0,0 +1,166 @@
+from socket import *
+import socket
+import os
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+
+import server_thread_pool_http
+
+#launcher multi-process untuk server_thread_pool_http: N worker process, masing-masing
+#dengan thread pool dan HttpServer sendiri, sehingga json/base64/gzip di HttpServer tidak
+#lagi dibatasi GIL satu process.
+#Semua worker memakai port yang sama, lewat listening socket yang diwariskan dari launcher
+#(default) atau socket sendiri dengan SO_REUSEPORT (--reuse-port).
+#Worker dijalankan dengan start method 'spawn', jadi worker baru selalu memuat kode terbaru.
+#
+#sinyal ke launcher:
+#- SIGHUP: rolling restart, worker diganti satu per satu. Worker baru dijalankan dan
+#  ditunggu siap dulu, baru worker lama diminta berhenti, sehingga port selalu dilayani
+#- SIGTERM/SIGINT: semua worker diminta berhenti, launcher menunggu sampai DRAIN_TIMEOUT
+#
+#worker yang diminta berhenti (SIGTERM) menutup listening socket-nya, menyelesaikan
+#koneksi yang sedang dilayani, lalu keluar; yang masih hidup setelah DRAIN_TIMEOUT di-kill.
+#Catatan: dengan --reuse-port, koneksi yang masih di antrean accept socket worker lama
+#ikut hilang saat socket itu ditutup; socket warisan tidak punya masalah ini
+
+PORT = 8885
+DRAIN_TIMEOUT = 20
+READY_TIMEOUT = 10
+PARENT_CHECK_INTERVAL = 1.0
+
+def make_listen_socket(port=PORT, reuse_port=False, backlog=128):
+	my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+	my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+	if reuse_port:
+		my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+	my_socket.bind(('0.0.0.0', port))
+	my_socket.listen(backlog)
+	return my_socket
+
+def Worker(worker_id, my_socket, port, backlog, pool_size, max_pending, ready):
+	#Ctrl-C dikirim ke seluruh process group, penghentian worker diatur oleh launcher
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+	if my_socket is None:
+		my_socket = make_listen_socket(port, reuse_port=True, backlog=backlog)
+
+	def stop(signum, frame):
+		#berhenti menerima koneksi baru, koneksi yang sedang dilayani diselesaikan dulu
+		server_thread_pool_http.stopping.set()
+		my_socket.close()
+	signal.signal(signal.SIGTERM, stop)
+
+	#jika launcher mati (misalnya kena SIGKILL), worker berhenti dengan rapi lewat SIGTERM ke
+	#dirinya sendiri, agar tidak terus accept di port dan menghalangi launcher baru
+	parent_pid = os.getppid()
+	def watch_parent():
+		while os.getppid() == parent_pid:
+			time.sleep(PARENT_CHECK_INTERVAL)
+		logging.warning("worker {} (pid {}): launcher is gone, stopping".format(worker_id, os.getpid()))
+		os.kill(os.getpid(), signal.SIGTERM)
+	threading.Thread(target=watch_parent, daemon=True).start()
+
+	logging.warning("worker {} (pid {}) accepting connections".format(worker_id, os.getpid()))
+	ready.set()
+	server_thread_pool_http.Serve(my_socket, pool_size, max_pending, verbose=False)
+	logging.warning("worker {} (pid {}) stopped".format(worker_id, os.getpid()))
+
+def Server(processes=None, pool_size=20, port=PORT, reuse_port=False, backlog=128, max_pending=64,
+           drain_timeout=DRAIN_TIMEOUT):
+	processes = processes or os.cpu_count() or 1
+	ctx = multiprocessing.get_context('spawn')
+	my_socket = None if reuse_port else make_listen_socket(port, backlog=backlog)
+	the_workers = {}
+	#worker lama yang sedang menyelesaikan koneksinya: (process, batas waktu)
+	draining = []
+	#sinyal hanya dicatat di handler, lalu diproses di loop utama
+	pending_signals = []
+
+	def on_signal(signum, frame):
+		pending_signals.append(signum)
+	signal.signal(signal.SIGHUP, on_signal)
+	signal.signal(signal.SIGTERM, on_signal)
+	signal.signal(signal.SIGINT, on_signal)
+
+	def start_worker(worker_id):
+		ready = ctx.Event()
+		p = ctx.Process(target=Worker, args=(worker_id, my_socket, port, backlog, pool_size, max_pending, ready),
+		                daemon=True)
+		p.start()
+		if not ready.wait(READY_TIMEOUT):
+			logging.warning("worker {} (pid {}) not ready after {}s".format(worker_id, p.pid, READY_TIMEOUT))
+		the_workers[worker_id] = p
+
+	def retire(p):
+		if p.is_alive():
+			os.kill(p.pid, signal.SIGTERM)
+		draining.append((p, time.time() + drain_timeout))
+
+	def reap(force=False):
+		for item in list(draining):
+			p, deadline = item
+			if not p.is_alive():
+				p.join()
+				draining.remove(item)
+			elif force or time.time() > deadline:
+				logging.warning("worker pid {} still busy after {}s, killing it".format(p.pid, drain_timeout))
+				p.kill()
+				p.join()
+				draining.remove(item)
+
+	mode = "SO_REUSEPORT" if reuse_port else "shared listening socket"
+	logging.warning("launcher (pid {}) starting {} workers on port {} ({}), {} threads each".format(
+		os.getpid(), processes, port, mode, pool_size))
+	try:
+		for worker_id in range(processes):
+			start_worker(worker_id)
+		while True:
+			time.sleep(0.5)
+			while pending_signals:
+				signum = pending_signals.pop(0)
+				if signum != signal.SIGHUP:
+					return
+				logging.warning("SIGHUP received, rolling restart of {} workers".format(len(the_workers)))
+				for worker_id in list(the_workers):
+					old = the_workers[worker_id]
+					start_worker(worker_id)
+					retire(old)
+			#worker yang mati (crash) dijalankan ulang
+			for worker_id, p in list(the_workers.items()):
+				if not p.is_alive():
+					logging.warning("worker {} (pid {}) exited with code {}, restarting".format(worker_id, p.pid, p.exitcode))
+					start_worker(worker_id)
+			reap()
+	finally:
+		logging.warning("shutting down {} workers".format(len(the_workers)))
+		for p in the_workers.values():
+			retire(p)
+		the_workers.clear()
+		while draining and all(time.time() <= deadline for p, deadline in draining):
+			reap()
+			time.sleep(0.1)
+		reap(force=True)
+		if my_socket:
+			my_socket.close()
+		logging.warning("launcher stopped")
+
+def main():
+	import argparse
+	parser = argparse.ArgumentParser(description='HTTP Server (multi-process, thread pool per process)')
+	parser.add_argument('--processes', type=int, default=None, help='Number of worker processes (default: CPU count)')
+	parser.add_argument('--pool-size', type=int, default=20, help='Threads per worker process (default: 20)')
+	parser.add_argument('--port', type=int, default=PORT, help='Server port (default: {})'.format(PORT))
+	parser.add_argument('--reuse-port', action='store_true', help='Every worker binds its own socket with SO_REUSEPORT')
+	parser.add_argument('--backlog', type=int, default=128, help='Listen backlog per socket (default: 128)')
+	parser.add_argument('--max-pending', type=int, default=64,
+	                    help='Accepted connections per worker allowed to wait for a thread (default: 64)')
+	parser.add_argument('--drain-timeout', type=float, default=DRAIN_TIMEOUT,
+	                    help='Seconds a stopping worker may spend finishing its connections (default: {})'.format(DRAIN_TIMEOUT))
+	args = parser.parse_args()
+	Server(processes=args.processes, pool_size=args.pool_size, port=args.port, reuse_port=args.reuse_port,
+	       backlog=args.backlog, max_pending=args.max_pending, drain_timeout=args.drain_timeout)
+
+if __name__=="__main__":
+	main()
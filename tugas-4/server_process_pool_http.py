@@ -2,10 +2,12 @@ from socket import *
 import socket
 import time
 import sys
+import os
+import signal
 import logging
 import multiprocessing
-from concurrent.futures import ProcessPoolExecutor
 from http import HttpServer
+from http_connection import ProcessTheClient as ProcessConnection
 
 httpserver = HttpServer()
 
@@ -13,57 +15,106 @@ httpserver = HttpServer()
 #maka class ProcessTheClient dirubah dulu menjadi function, tanpda memodifikasi behaviour didalamnya
 
 def ProcessTheClient(connection,address):
-		rcv=""
-		while True:
-			try:
-				data = connection.recv(32)
-				if data:
-					#merubah input dari socket (berupa bytes) ke dalam string
-					#agar bisa mendeteksi \r\n
-					d = data.decode()
-					rcv=rcv+d
-					if rcv[-2:]=='\r\n':
-						#end of command, proses string
-						#logging.warning("data dari client: {}" . format(rcv))
-						hasil = httpserver.proses(rcv)
-						#hasil akan berupa bytes
-						#untuk bisa ditambahi dengan string, maka string harus di encode
-						hasil=hasil+"\r\n\r\n".encode()
-						#logging.warning("balas ke  client: {}" . format(hasil))
-						#hasil sudah dalam bentuk bytes
-						connection.sendall(hasil)
-						rcv=""
-						connection.close()
-						return
-				else:
-					break
-			except OSError as e:
-				pass
-		connection.close()
-		return
+	#request dibaca sesuai Content-Length dan koneksi dipakai ulang (keep-alive),
+	#lihat http_connection.py
+	ProcessConnection(connection, address, httpserver)
+
 
 
+#ProcessPoolExecutor harus mem-pickle socket koneksi ke process lain untuk setiap request,
+#jadi diganti dengan model pre-fork: setiap worker process menjalankan accept loop sendiri
+#pada listening socket yang diwariskan (atau dibuka sendiri dengan SO_REUSEPORT).
+#Worker hanya accept saat tidak sedang melayani koneksi, jadi antrean koneksi yang
+#menunggu adalah backlog listen di kernel, ukurannya diatur dengan --backlog
 
-def Server():
-	the_clients = []
+def make_listen_socket(reuse_port=False, backlog=128):
 	my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 	my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-
+	if reuse_port:
+		my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
 	my_socket.bind(('0.0.0.0', 8889))
-	my_socket.listen(1)
+	my_socket.listen(backlog)
+	return my_socket
+
+PARENT_CHECK_INTERVAL = 1.0
+
+def exit_with_parent(parent_pid):
+	#worker tidak boleh terus accept di port setelah process utama mati (misalnya kena SIGKILL),
+	#karena akan menghalangi server di-restart. Di Linux kernel mengirim SIGTERM ke worker
+	#saat parent mati (PR_SET_PDEATHSIG); hasil False berarti parent harus dicek sendiri
+	try:
+		import ctypes
+		libc = ctypes.CDLL(None, use_errno=True)
+		PR_SET_PDEATHSIG = 1
+		if libc.prctl(PR_SET_PDEATHSIG, signal.SIGTERM, 0, 0, 0) != 0:
+			return False
+	except (OSError, AttributeError):
+		return False
+	#parent bisa saja sudah mati sebelum prctl dipanggil
+	if os.getppid() != parent_pid:
+		os._exit(0)
+	return True
 
-	with ProcessPoolExecutor(20) as executor:
+def Worker(worker_id, my_socket=None, backlog=128, parent_pid=None):
+	if my_socket is None:
+		my_socket = make_listen_socket(reuse_port=True, backlog=backlog)
+	watch_parent = parent_pid is not None and not exit_with_parent(parent_pid)
+	if watch_parent:
+		#tanpa prctl: accept diberi timeout dan parent dicek setiap kali timeout
+		my_socket.settimeout(PARENT_CHECK_INTERVAL)
+	try:
 		while True:
+			try:
 				connection, client_address = my_socket.accept()
-				#logging.warning("connection from {}".format(client_address))
-				p = executor.submit(ProcessTheClient, connection, client_address)
-				the_clients.append(p)
-				#menampilkan jumlah process yang sedang aktif
-				jumlah = ['x' for i in the_clients if i.running()==True]
-				print(jumlah)
+			except socket.timeout:
+				if os.getppid() != parent_pid:
+					logging.warning("worker {}: parent process is gone, exiting".format(worker_id))
+					break
+				continue
+			#logging.warning("worker {} connection from {}".format(worker_id, client_address))
+			ProcessTheClient(connection, client_address)
+	except KeyboardInterrupt:
+		pass
+	finally:
+		my_socket.close()
+
+def Server(workers=20, reuse_port=False, backlog=128):
+	my_socket = None if reuse_port else make_listen_socket(backlog=backlog)
+	the_workers = {}
+
+	def start_worker(worker_id):
+		p = multiprocessing.Process(target=Worker, args=(worker_id, my_socket, backlog, os.getpid()), daemon=True)
+		p.start()
+		the_workers[worker_id] = p
+
+	try:
+		for worker_id in range(workers):
+			start_worker(worker_id)
+		while True:
+			time.sleep(1)
+			#worker yang mati (crash) dijalankan ulang
+			for worker_id, p in list(the_workers.items()):
+				if not p.is_alive():
+					logging.warning("worker {} (pid {}) exited with code {}, restarting".format(worker_id, p.pid, p.exitcode))
+					start_worker(worker_id)
+	except KeyboardInterrupt:
+		pass
+	finally:
+		for p in the_workers.values():
+			p.terminate()
+		for p in the_workers.values():
+			p.join()
+		if my_socket:
+			my_socket.close()
 
 def main():
-	Server()
+	import argparse
+	parser = argparse.ArgumentParser(description='HTTP Server (pre-fork)')
+	parser.add_argument('--workers', type=int, default=20, help='Number of worker processes (default: 20)')
+	parser.add_argument('--reuse-port', action='store_true', help='Every worker binds its own socket with SO_REUSEPORT')
+	parser.add_argument('--backlog', type=int, default=128, help='Listen backlog per socket (default: 128)')
+	args = parser.parse_args()
+	Server(workers=args.workers, reuse_port=args.reuse_port, backlog=args.backlog)
 
 if __name__=="__main__":
 	main()
@@ -3,67 +3,80 @@ import socket
 import time
 import sys
 import logging
+import threading
 import multiprocessing
 from concurrent.futures import ThreadPoolExecutor
 from http import HttpServer
+from http_connection import ProcessTheClient as ProcessConnection, RejectTheClient
+from admission import AdmissionController
 
 httpserver = HttpServer()
+#di-set saat server berhenti dengan rapi: koneksi keep-alive ditutup setelah respons berikutnya
+stopping = threading.Event()
 
 #untuk menggunakan threadpool executor, karena tidak mendukung subclassing pada process,
 #maka class ProcessTheClient dirubah dulu menjadi function, tanpda memodifikasi behaviour didalamnya
 
 def ProcessTheClient(connection,address):
-		rcv=""
-		while True:
-			try:
-				data = connection.recv(32)
-				if data:
-					#merubah input dari socket (berupa bytes) ke dalam string
-					#agar bisa mendeteksi \r\n
-					d = data.decode()
-					rcv=rcv+d
-					if rcv[-2:]=='\r\n':
-						#end of command, proses string
-						#logging.warning("data dari client: {}" . format(rcv))
-						hasil = httpserver.proses(rcv)
-						#hasil akan berupa bytes
-						#untuk bisa ditambahi dengan string, maka string harus di encode
-						hasil=hasil+"\r\n\r\n".encode()
-						#logging.warning("balas ke  client: {}" . format(hasil))
-						#hasil sudah dalam bentuk bytes
-						connection.sendall(hasil)
-						rcv=""
-						connection.close()
-						return
-				else:
-					break
-			except OSError as e:
-				pass
-		connection.close()
-		return
+	#request dibaca sesuai Content-Length dan koneksi dipakai ulang (keep-alive),
+	#lihat http_connection.py
+	ProcessConnection(connection, address, httpserver, stopping=stopping)
 
+def RejectClient(connection, address, retry_after):
+	RejectTheClient(connection, address, httpserver, retry_after)
 
 
-def Server():
-	the_clients = []
+
+#paling banyak pool_size koneksi dilayani dan max_pending menunggu di antrean executor,
+#koneksi berikutnya langsung dijawab 503 dengan Retry-After (lihat admission.py)
+
+def Server(pool_size=20, backlog=128, max_pending=64):
 	my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 	my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
 	my_socket.bind(('0.0.0.0', 8885))
-	my_socket.listen(1)
+	my_socket.listen(backlog)
+	Serve(my_socket, pool_size, max_pending)
+
+#accept loop berhenti jika my_socket ditutup (lihat server_multiprocess_http.py),
+#lalu menunggu koneksi yang sedang dilayani selesai
+
+def Serve(my_socket, pool_size=20, max_pending=64, verbose=True):
+	the_clients = []
+	admission = AdmissionController(pool_size, max_pending, reject=RejectClient)
 
-	with ThreadPoolExecutor(20) as executor:
+	with ThreadPoolExecutor(pool_size) as executor:
 		while True:
-				connection, client_address = my_socket.accept()
+				try:
+					connection, client_address = my_socket.accept()
+				except OSError as e:
+					if my_socket.fileno() == -1:
+						break
+					#misalnya EMFILE: koneksi lain dibiarkan selesai dulu
+					logging.warning("accept failed: {}".format(e))
+					time.sleep(0.1)
+					continue
 				#logging.warning("connection from {}".format(client_address))
-				p = executor.submit(ProcessTheClient, connection, client_address)
+				p = admission.submit(executor.submit, ProcessTheClient, connection, client_address)
+				if p is None:
+					continue
+				#future yang sudah selesai dibuang agar list tidak terus membesar
+				the_clients = [i for i in the_clients if not i.done()]
 				the_clients.append(p)
-				#menampilkan jumlah process yang sedang aktif
-				jumlah = ['x' for i in the_clients if i.running()==True]
-				print(jumlah)
+				if verbose:
+					#menampilkan jumlah process yang sedang aktif
+					jumlah = ['x' for i in the_clients if i.running()==True]
+					print(jumlah)
 
 def main():
-	Server()
+	import argparse
+	parser = argparse.ArgumentParser(description='HTTP Server (thread pool)')
+	parser.add_argument('--pool-size', type=int, default=20, help='Number of worker threads (default: 20)')
+	parser.add_argument('--backlog', type=int, default=128, help='Listen backlog (default: 128)')
+	parser.add_argument('--max-pending', type=int, default=64,
+	                    help='Accepted connections allowed to wait for a thread before new ones get 503 (default: 64)')
+	args = parser.parse_args()
+	Server(pool_size=args.pool_size, backlog=args.backlog, max_pending=args.max_pending)
 
 if __name__=="__main__":
 	main()
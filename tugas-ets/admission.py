@@ -0,0 +1,155 @@
+import time
+import queue
+import socket
+import logging
+import threading
+
+"""
+* AdmissionController membatasi jumlah koneksi yang sedang dilayani
+ditambah yang menunggu giliran di executor (workers + max_pending).
+Koneksi di luar batas itu langsung ditolak, tidak ikut mengantre tanpa
+batas di ThreadPoolExecutor sampai client timeout
+
+* koneksi yang ditolak diserahkan ke satu thread penolak, yang membalas
+dengan pesan sibuk (BUSY, atau HTTP 503 dengan Retry-After) lalu menutup
+koneksi, sehingga accept loop tidak pernah menunggu client yang ditolak
+
+* waktu tunggu di antrean (dari accept sampai mulai dilayani) dicatat;
+ringkasannya ditulis ke log setiap report_interval detik jika ada aktivitas
+
+* slot dilepas setelah handler selesai, termasuk mengirim balasan terakhir
+dan menutup koneksi. Client yang langsung membuka koneksi baru setelah
+menerima balasan bisa mendapat BUSY palsu karena slotnya belum dilepas;
+dengan submit(..., early_release=True) handler menerima release() dan bisa
+melepas slot sebelum balasan terakhir dikirim
+"""
+
+REJECT_QUEUE = 128
+REJECT_TIMEOUT = 1.0
+
+
+class AdmissionController:
+    def __init__(self, workers, max_pending=None, reject=None, retry_after=1, report_interval=10):
+        # reject(connection, address, retry_after) mengirim balasan sibuk; None berarti langsung ditutup
+        self.workers = workers
+        self.max_pending = workers if max_pending is None else max_pending
+        self.reject_handler = reject
+        self.retry_after = retry_after
+        self.report_interval = report_interval
+        self.slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+        self.rejects = queue.Queue(REJECT_QUEUE)
+        self.lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+        self.active = 0
+        self.pending = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.started = False
+
+    def start(self):
+        if not self.started:
+            self.started = True
+            threading.Thread(target=self._reject_loop, daemon=True).start()
+            if self.report_interval:
+                threading.Thread(target=self._report_loop, daemon=True).start()
+        return self
+
+    def try_admit(self, connection, address):
+        # True jika koneksi boleh dilayani; jika tidak, koneksi sudah diserahkan ke thread penolak
+        if self.slots.acquire(blocking=False):
+            with self.lock:
+                self.pending += 1
+            return True
+        with self.lock:
+            self.rejected += 1
+        logging.warning(f"server busy, rejecting connection from {address}")
+        try:
+            self.rejects.put_nowait((connection, address))
+        except queue.Full:
+            connection.close()
+        return False
+
+    def begin(self, enqueued):
+        # dipanggil saat worker mulai melayani koneksi yang diterima pada waktu enqueued
+        wait = time.monotonic() - enqueued
+        with self.lock:
+            self.pending -= 1
+            self.active += 1
+            self.admitted += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def done(self):
+        with self.lock:
+            self.active -= 1
+        self.slots.release()
+
+    def submit(self, spawn, fn, connection, address, early_release=False):
+        # spawn(callable, *args) menjalankan callable di worker, misalnya executor.submit;
+        # hasil spawn dikembalikan, atau None jika koneksi ditolak.
+        # early_release: fn dipanggil dengan release=callable untuk melepas slot lebih awal
+        self.start()
+        if not self.try_admit(connection, address):
+            return None
+        return spawn(self._run, time.monotonic(), fn, connection, address, early_release)
+
+    def _run(self, enqueued, fn, connection, address, early_release=False):
+        self.begin(enqueued)
+        released = False
+
+        def release():
+            # boleh dipanggil berkali-kali, slot hanya dilepas sekali
+            nonlocal released
+            if not released:
+                released = True
+                self.done()
+        try:
+            if early_release:
+                fn(connection, address, release=release)
+            else:
+                fn(connection, address)
+        finally:
+            release()
+
+    def stats(self):
+        with self.lock:
+            return dict(admitted=self.admitted, rejected=self.rejected, active=self.active,
+                        pending=self.pending,
+                        queue_wait_avg=self.wait_total / self.admitted if self.admitted else 0,
+                        queue_wait_max=self.wait_max)
+
+    def _reject_loop(self):
+        while True:
+            connection, address = self.rejects.get()
+            try:
+                connection.settimeout(REJECT_TIMEOUT)
+                if self.reject_handler is not None:
+                    self.reject_handler(connection, address, self.retry_after)
+                linger_close(connection)
+            except OSError:
+                pass
+            finally:
+                connection.close()
+
+    def _report_loop(self):
+        last = None
+        while True:
+            time.sleep(self.report_interval)
+            s = self.stats()
+            if (s['admitted'], s['rejected']) != last:
+                last = (s['admitted'], s['rejected'])
+                logging.warning(f"admission: admitted={s['admitted']} rejected={s['rejected']} "
+                                f"active={s['active']} pending={s['pending']} "
+                                f"queue_wait avg={s['queue_wait_avg']*1000:.1f}ms max={s['queue_wait_max']*1000:.1f}ms")
+
+
+def linger_close(connection, timeout=REJECT_TIMEOUT):
+    # sisa data dari client (misalnya isi upload) dibaca dan dibuang sebentar
+    # sebelum ditutup, agar balasan tidak hilang karena connection reset
+    connection.shutdown(socket.SHUT_WR)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        connection.settimeout(max(deadline - time.monotonic(), 0.01))
+        if not connection.recv(64*1024):
+            return
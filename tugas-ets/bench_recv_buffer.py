@@ -0,0 +1,78 @@
+import argparse
+import socket
+import threading
+import time
+
+from recv_buffer import RecvBuffer
+
+"""
+* micro-benchmark untuk membandingkan loop penerimaan lama pada handle_client
+(str += data.decode() lalu split) dengan RecvBuffer (recv_into ke bytearray
+dan pencarian terminator bertahap)
+
+* setiap ukuran dikirim sebagai satu pesan teks berisi karakter base64
+yang diakhiri "\\r\\n\\r\\n", lewat socketpair sehingga biaya jaringan minimal
+"""
+
+TERMINATOR = b"\r\n\r\n"
+
+
+def kirim(sock, pesan):
+    sock.sendall(pesan)
+
+
+def terima_str(sock):
+    # salinan dari loop lama di server_threadpool/server_processpool
+    buffer = ""
+    while True:
+        data = sock.recv(1024*1024)
+        if not data:
+            break
+        buffer += data.decode()
+        while "\r\n\r\n" in buffer:
+            command, buffer = buffer.split("\r\n\r\n", 1)
+            return len(command)
+
+
+def terima_recv_buffer(sock):
+    buffer = RecvBuffer()
+    while buffer.recv_from(sock):
+        idx = buffer.find(TERMINATOR)
+        if idx >= 0:
+            with buffer.view(idx) as command:
+                panjang = len(command)
+            buffer.consume(idx + len(TERMINATOR))
+            return panjang
+
+
+def ukur(fungsi, pesan):
+    a, b = socket.socketpair()
+    pengirim = threading.Thread(target=kirim, args=(a, pesan))
+    mulai = time.perf_counter()
+    pengirim.start()
+    panjang = fungsi(b)
+    durasi = time.perf_counter() - mulai
+    pengirim.join()
+    a.close()
+    b.close()
+    assert panjang == len(pesan) - len(TERMINATOR)
+    return durasi
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Receive buffer micro-benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100],
+                        help='Frame sizes in MB (default: 10 50 100)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per size, best is reported (default: 3)')
+    args = parser.parse_args()
+
+    print(f"{'size_mb':>8} {'str_loop_s':>12} {'recv_buffer_s':>14} {'speedup':>8}")
+    for size_mb in args.sizes:
+        pesan = b'A' * (size_mb * 1024 * 1024) + TERMINATOR
+        lama = min(ukur(terima_str, pesan) for _ in range(args.repeat))
+        baru = min(ukur(terima_recv_buffer, pesan) for _ in range(args.repeat))
+        print(f"{size_mb:>8} {lama:>12.3f} {baru:>14.3f} {lama / baru:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
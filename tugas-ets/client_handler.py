@@ -0,0 +1,238 @@
+import json
+import socket
+import logging
+
+from recv_buffer import RecvBuffer
+from file_protocol import (
+    FRAME_MAGIC, FRAME_HEADER, OP_GET, OP_UPLOAD, STATUS_ERROR, STATUS_BUSY,
+    StreamResponse, unpack_frame_header, pack_frame,
+)
+
+"""
+* handle_client dipakai bersama oleh server_threadpool dan server_processpool
+
+* satu koneksi dapat mengirim beberapa pesan secara berurutan, dan setiap
+pesan boleh berupa perintah teks (diakhiri "\\r\\n\\r\\n") atau frame biner
+(diawali FRAME_MAGIC). Balasan selalu dikirim dalam mode yang sama dengan
+pesan yang diterima, sehingga client lama tetap bisa memakai protokol teks
+
+* GET tidak pernah dibaca utuh ke memori, isi file dikirim bertahap
+(lihat StreamResponse)
+
+* UPLOAD juga tidak ditampung utuh: isi file langsung ditulis ke file
+sementara setiap kali data diterima, lalu di-rename saat pesan selesai
+
+* data diterima ke RecvBuffer dengan recv_into, pesan diserahkan ke
+FileProtocol sebagai memoryview dari buffer tersebut tanpa salinan tambahan
+"""
+
+TERMINATOR = b"\r\n\r\n"
+UPLOAD_PREFIX = b"upload "
+SMALL_REPLY = 64*1024
+# payload frame selain UPLOAD (nama perintah saja) harus ditampung utuh di buffer,
+# jadi ukurannya dibatasi agar satu header palsu tidak membuat buffer membesar tanpa batas
+MAX_FRAME_PAYLOAD = 64*1024
+
+
+def handle_client(connection, address, fp, timeout=None):
+    ClientHandler(connection, address, fp).run(timeout)
+
+
+def reject_client(connection, address, retry_after=1):
+    # byte pertama menentukan mode client, balasan BUSY dikirim dalam mode yang sama
+    try:
+        first = connection.recv(1)
+    except socket.timeout:
+        first = b''
+    message = f"server busy, retry after {retry_after}s"
+    if first == FRAME_MAGIC[:1]:
+        connection.sendall(pack_frame(STATUS_BUSY, '', message.encode()))
+    else:
+        connection.sendall((json.dumps(dict(status='BUSY', data=message)) + "\r\n\r\n").encode())
+
+
+class PendingUpload:
+    def __init__(self, writer, binary, remaining=None, error=None):
+        # writer None berarti upload ditolak, data tetap dibaca lalu dibuang
+        self.writer = writer
+        self.binary = binary
+        # jumlah byte payload yang belum diterima (frame biner), None untuk teks
+        self.remaining = remaining
+        self.error = error
+
+
+class ClientHandler:
+    def __init__(self, connection, address, fp):
+        self.connection = connection
+        self.address = address
+        self.fp = fp
+        self.buffer = RecvBuffer()
+        self.upload = None
+
+    def run(self, timeout=None):
+        logging.warning(f"handling connection from {self.address}")
+        try:
+            if timeout is not None:
+                self.connection.settimeout(timeout)
+            # balasan kecil untuk perintah yang di-pipeline tidak ditahan Nagle
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            while self.buffer.recv_from(self.connection):
+                self.process_buffer()
+        except Exception as e:
+            logging.warning(f"Error: {str(e)}")
+        finally:
+            self.abort_upload()
+            logging.warning(f"connection from {self.address} closed")
+            self.connection.close()
+
+    def abort_upload(self):
+        # upload yang terputus di tengah jalan tidak boleh meninggalkan file sementara
+        if self.upload is not None and self.upload.writer is not None:
+            self.upload.writer.abort()
+        self.upload = None
+
+    def kirim(self, response):
+        # semua balasan lewat sini, bisa diganti oleh subclass (lihat server_asyncio)
+        send_response(self.connection, response)
+
+    def process_buffer(self):
+        # memproses semua pesan lengkap di dalam buffer, sisa pesan yang belum
+        # lengkap dibiarkan di buffer
+        buffer = self.buffer
+        while buffer:
+            if self.upload is not None:
+                if not self.continue_upload():
+                    break
+            elif buffer.peek(1) == FRAME_MAGIC[:1]:
+                if not self.process_frame():
+                    break
+            elif buffer.peek(len(UPLOAD_PREFIX)).lower() == UPLOAD_PREFIX[:len(buffer)]:
+                if not self.begin_text_upload():
+                    break
+            elif not self.process_command():
+                break
+        if self.upload is None:
+            # pesan besar sudah selesai, koneksi idle kembali memakai buffer kecil
+            buffer.shrink()
+
+    def process_frame(self):
+        buffer = self.buffer
+        if len(buffer) < FRAME_HEADER.size:
+            return False
+        try:
+            opcode, name_len, payload_len = unpack_frame_header(buffer.peek(FRAME_HEADER.size))
+        except ValueError as e:
+            # sisa stream tidak bisa dipercaya lagi, koneksi ditutup
+            self.kirim(pack_frame(STATUS_ERROR, '', str(e).encode()))
+            raise
+        start = FRAME_HEADER.size
+        if opcode == OP_UPLOAD:
+            # payload upload tidak perlu ditunggu lengkap
+            if len(buffer) < start + name_len:
+                return False
+            filename = buffer.peek(name_len, start).decode()
+            buffer.consume(start + name_len)
+            self.start_upload(filename, binary=True, remaining=payload_len)
+            if payload_len == 0:
+                self.continue_upload()
+            return True
+
+        if payload_len > MAX_FRAME_PAYLOAD:
+            self.kirim(pack_frame(STATUS_ERROR, '', b'Frame payload too large'))
+            raise ValueError(f"frame payload of {payload_len} bytes exceeds {MAX_FRAME_PAYLOAD}")
+        total = start + name_len + payload_len
+        if len(buffer) < total:
+            return False
+        filename = buffer.peek(name_len, start).decode()
+        if opcode == OP_GET:
+            buffer.consume(total)
+            self.kirim(self.fp.proses_get([filename], binary=True))
+            return True
+        with buffer.view(payload_len, start + name_len) as payload:
+            header, body = self.fp.proses_frame(opcode, filename, payload)
+        buffer.consume(total)
+        if len(body) < SMALL_REPLY:
+            # header dan body terpisah akan tertahan Nagle/delayed ACK di client yang
+            # langsung mengirim perintah berikutnya, balasan kecil dikirim sekaligus
+            self.kirim(header + body)
+        else:
+            self.kirim(header)
+            self.kirim(body)
+        return True
+
+    def begin_text_upload(self):
+        # "UPLOAD namafile isi_base64": setelah spasi kedua diterima, sisa pesan
+        # adalah isi file sehingga bisa langsung ditulis tanpa menunggu terminator
+        buffer = self.buffer
+        if len(buffer) < len(UPLOAD_PREFIX):
+            return self.process_command()
+        space = buffer.find_byte(b" ", len(UPLOAD_PREFIX))
+        end = buffer.find(TERMINATOR)
+        if space < 0 or (0 <= end < space):
+            # nama file belum lengkap, atau perintah tidak berisi isi file
+            return self.process_command()
+        filename = buffer.peek(space - len(UPLOAD_PREFIX), len(UPLOAD_PREFIX)).decode()
+        buffer.consume(space + 1)
+        self.start_upload(filename, binary=False)
+        return True
+
+    def start_upload(self, filename, binary, remaining=None):
+        cl = self.fp.upload_begin(filename, binary)
+        if cl['status'] == 'OK':
+            self.upload = PendingUpload(cl['data'], binary, remaining)
+        else:
+            self.upload = PendingUpload(None, binary, remaining, error=cl)
+
+    def continue_upload(self):
+        buffer = self.buffer
+        upload = self.upload
+        if upload.binary:
+            n = min(len(buffer), upload.remaining)
+            done = n == upload.remaining
+        else:
+            end = buffer.find(TERMINATOR)
+            done = end >= 0
+            # 3 byte terakhir bisa jadi awal dari terminator yang belum lengkap
+            n = end if done else max(len(buffer) - len(TERMINATOR) + 1, 0)
+        if n and upload.writer is not None:
+            with buffer.view(n) as chunk:
+                upload.writer.write(chunk)
+        if upload.binary:
+            upload.remaining -= n
+            buffer.consume(n)
+        else:
+            buffer.consume(n + len(TERMINATOR) if done else n)
+        if not done:
+            return False
+
+        self.upload = None
+        if upload.writer is None:
+            response = self.fp.format_result(upload.error, upload.binary)
+        else:
+            response = self.fp.upload_finish(upload.writer, upload.binary)
+        self.kirim(response)
+        return True
+
+    def process_command(self):
+        buffer = self.buffer
+        idx = buffer.find(TERMINATOR)
+        if idx < 0:
+            return False
+        with buffer.view(idx) as view:
+            command = str(view, 'utf-8')
+        buffer.consume(idx + len(TERMINATOR))
+        if command.lstrip()[:4].lower() == 'get ':
+            c_request, params = self.fp.parse_string(command)
+            self.kirim(self.fp.proses_get(params))
+            return True
+        hasil = self.fp.proses_string(command)
+        response = hasil + "\r\n\r\n"
+        self.kirim(response.encode())
+        return True
+
+
+def send_response(connection, response):
+    if isinstance(response, StreamResponse):
+        response.send(connection)
+    else:
+        connection.sendall(response)
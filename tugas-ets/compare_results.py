@@ -0,0 +1,172 @@
+import argparse
+import csv
+import statistics
+import sys
+
+"""
+* membandingkan CSV hasil save_results_to_csv: file pertama adalah baseline,
+file berikutnya masing-masing dibandingkan terhadap baseline tersebut
+
+* baris digabung berdasarkan KEY (operation, file_size_mb, client_pool_size,
+server_pool_size, executor_type), ditambah kolom OPTIONAL_KEY (protocol,
+server_type, pengaturan session/open loop) yang ada di kedua file. Jika
+satu file berisi beberapa baris dengan key yang sama (test diulang),
+nilainya diambil median dan sebaran antar ulangan dipakai sebagai
+perkiraan noise. Jika satu grup ternyata mencampur nilai kolom yang tidak
+ikut key (misalnya text dan binary), ditulis peringatan karena sebarannya
+bukan lagi noise
+
+* perubahan dianggap regresi jika lebih buruk dari threshold relatif
+(default 5%, atau sebaran ulangan jika lebih besar) dan lebih besar dari
+batas absolut metrik tersebut (perbedaan latency di bawah 1 ms diabaikan)
+
+* --ignore menghapus kolom dari key, misalnya "--ignore executor_type"
+untuk membandingkan hasil executor thread dengan executor process
+
+* exit code 1 jika ada regresi, sehingga bisa dipakai sebagai gate
+"""
+
+KEY = ('operation', 'file_size_mb', 'client_pool_size', 'server_pool_size', 'executor_type')
+# ikut key hanya jika kolomnya ada di baseline dan candidate (CSV lama belum punya kolom ini)
+OPTIONAL_KEY = ('protocol', 'server_type', 'pipeline_depth', 'session_requests', 'target_rps', 'mix')
+
+# (kolom, arah, batas absolut): arah 1 = lebih besar lebih baik, -1 = lebih kecil lebih baik
+METRICS = (
+    ('avg_throughput', 1, 0),
+    ('median_throughput', 1, 0),
+    ('achieved_rps', 1, 0),
+    ('total_requests_per_sec', 1, 0),
+    ('avg_conn_requests_per_sec', 1, 0),
+    ('avg_duration', -1, 0.001),
+    ('median_duration', -1, 0.001),
+    ('latency_p50', -1, 0.001),
+    ('latency_p99', -1, 0.001),
+    ('latency_p999', -1, 0.001),
+    ('fail_rate', -1, 0.01),
+)
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_columns(filename):
+    with open(filename, newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def load_results(filename, key=KEY):
+    # {key: {metric: [nilai per ulangan]}}
+    groups = {}
+    # nilai kolom KEY/OPTIONAL_KEY yang tidak ikut key, per grup
+    mixed = {}
+    with open(filename, newline='') as f:
+        reader = csv.DictReader(f)
+        watch = [k for k in KEY + OPTIONAL_KEY if k not in key and k in (reader.fieldnames or [])]
+        for row in reader:
+            total = to_float(row.get('total_ops'))
+            fail = to_float(row.get('fail_count'))
+            if total and fail is not None:
+                row['fail_rate'] = fail / total
+            group_key = tuple(row.get(k) or '' for k in key)
+            group = groups.setdefault(group_key, {})
+            for metric, _, _ in METRICS:
+                value = to_float(row.get(metric))
+                if value is not None:
+                    group.setdefault(metric, []).append(value)
+            for k in watch:
+                mixed.setdefault((group_key, k), set()).add(row.get(k) or '')
+    for (group_key, k), values in mixed.items():
+        if len(values) > 1:
+            print(f"warning: {filename}: configuration {'/'.join(group_key)} mixes {k} values "
+                  f"{sorted(values)}, their spread is counted as noise", file=sys.stderr)
+    return groups
+
+
+def spread(values):
+    # sebaran relatif antar ulangan, 0 jika hanya satu nilai
+    middle = statistics.median(values)
+    if len(values) < 2 or middle == 0:
+        return 0
+    return (max(values) - min(values)) / abs(middle)
+
+
+def compare_metric(baseline, candidate, direction, min_abs, threshold):
+    base = statistics.median(baseline)
+    cand = statistics.median(candidate)
+    noise = max(threshold, spread(baseline), spread(candidate))
+    change = (cand - base) / abs(base) if base else (0 if cand == base else float('inf'))
+    worse = (base - cand) * direction
+    if abs(cand - base) <= min_abs or abs(change) <= noise:
+        verdict = 'same'
+    elif worse > 0:
+        verdict = 'REGRESSION'
+    else:
+        verdict = 'better'
+    return dict(baseline=base, candidate=cand, change=change, noise=noise, verdict=verdict)
+
+
+def compare(baseline, candidate, threshold=0.05):
+    rows = []
+    missing = [key for key in baseline if key not in candidate]
+    for key, metrics in candidate.items():
+        if key not in baseline:
+            continue
+        for metric, direction, min_abs in METRICS:
+            if metric in metrics and metric in baseline[key]:
+                result = compare_metric(baseline[key][metric], metrics[metric], direction, min_abs, threshold)
+                rows.append(dict(key=key, metric=metric, **result))
+    return rows, missing
+
+
+def format_value(value):
+    if abs(value) >= 1e5:
+        return f"{value:.3e}"
+    return f"{value:.4f}"
+
+
+def print_table(title, rows, show_all=False):
+    print(title)
+    print(f"{'configuration':<36} {'metric':<26} {'baseline':>11} {'candidate':>11} {'change':>8} {'noise':>6}  verdict")
+    for row in rows:
+        if not show_all and row['verdict'] == 'same':
+            continue
+        config = '/'.join(row['key'])
+        print(f"{config:<36} {row['metric']:<26} {format_value(row['baseline']):>11} "
+              f"{format_value(row['candidate']):>11} {row['change']:>+7.1%} {row['noise']:>6.1%}  {row['verdict']}")
+    counts = {v: sum(1 for r in rows if r['verdict'] == v) for v in ('REGRESSION', 'better', 'same')}
+    print(f"{counts['REGRESSION']} regressions, {counts['better']} improvements, {counts['same']} unchanged\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare stress test result CSVs against a baseline')
+    parser.add_argument('baseline', help='Baseline CSV from save_results_to_csv')
+    parser.add_argument('candidates', nargs='+', help='CSV files to compare against the baseline')
+    parser.add_argument('--threshold', type=float, default=5.0,
+                        help='Relative change in percent treated as noise (default: 5)')
+    parser.add_argument('--ignore', nargs='+', default=[], choices=KEY + OPTIONAL_KEY,
+                        help='Key columns to leave out of the join')
+    parser.add_argument('--all', action='store_true', help='Also show unchanged metrics')
+    args = parser.parse_args()
+
+    baseline_columns = read_columns(args.baseline)
+    regressions = 0
+    for filename in args.candidates:
+        columns = read_columns(filename)
+        key = tuple(k for k in KEY if k not in args.ignore) + tuple(
+            k for k in OPTIONAL_KEY if k not in args.ignore and k in baseline_columns and k in columns)
+        baseline = load_results(args.baseline, key)
+        rows, missing = compare(baseline, load_results(filename, key), args.threshold / 100.0)
+        print_table(f"{args.baseline} -> {filename}", rows, args.all)
+        if missing:
+            print(f"warning: {len(missing)} configurations missing from {filename}, "
+                  f"e.g. {'/'.join(missing[0])}", file=sys.stderr)
+        regressions += sum(1 for r in rows if r['verdict'] == 'REGRESSION')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,68 @@
 import os
 import json
 import base64
-from glob import glob
+import uuid
+
+from file_cache import LRUCache, file_key
+from file_map import MmapCache
+from dir_index import DirectoryIndex
+
+
+class UploadWriter:
+    """
+    menulis file upload secara bertahap ke file sementara (diawali titik agar
+    tidak ikut muncul di LIST), lalu dipindah ke nama aslinya dengan os.replace
+    sehingga client lain tidak pernah melihat file yang setengah jadi
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        dirname, basename = os.path.split(filename)
+        self.tmp_path = os.path.join(dirname, f".{basename}.{uuid.uuid4().hex}.part")
+        fd = os.open(self.tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        self.fp = os.fdopen(fd, 'wb')
+        self.size = 0
+
+    def write(self, data):
+        self.fp.write(data)
+        self.size += len(data)
+
+    def commit(self):
+        try:
+            self.fp.close()
+            os.replace(self.tmp_path, self.filename)
+        except Exception:
+            self.abort()
+            raise
+
+    def abort(self):
+        self.fp.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+class Base64UploadWriter(UploadWriter):
+    # base64 didekode per kelipatan 4 karakter, sisanya disimpan untuk write berikutnya
+    WHITESPACE = b' \t\r\n'
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.sisa = b''
+
+    def write(self, data):
+        data = self.sisa + bytes(data).translate(None, self.WHITESPACE)
+        n = len(data) - len(data) % 4
+        self.sisa = data[n:]
+        if n:
+            super().write(base64.b64decode(data[:n]))
+
+    def commit(self):
+        if self.sisa:
+            self.abort()
+            raise ValueError('Incorrect padding')
+        super().commit()
+
 
 class FileInterface:
     def __init__(self):
@@ -15,33 +76,131 @@ class FileInterface:
                 raise OSError(f"Error creating directory '{self.files_dir}': {e}")
         elif not os.path.isdir(self.files_dir):
             raise NotADirectoryError(f"Path '{self.files_dir}' exists but is not a directory.")
+
+        # cache isi file yang sering diminta (lihat file_cache.py), dipakai juga oleh FileProtocol
+        self.cache = LRUCache()
+        # mapping file yang dipakai bersama oleh semua request, lihat file_map.py
+        self.maps = MmapCache()
+        # index isi direktori untuk LIST, sama dengan glob('*.*'): nama berisi titik dan bukan file tersembunyi
+        self.index = DirectoryIndex('.', name_filter=lambda name: '.' in name and not name.startswith('.'))
         
     def list(self, params=[]):
         try:
-            filelist = glob('*.*')
+            filelist = self.index.names()
             return dict(status='OK', data=filelist)
         except Exception as e:
             return dict(status='ERROR', data=str(e))
 
+    def list_json(self, params=[]):
+        # hasil LIST yang sudah dalam bentuk JSON, hanya dibuat ulang jika isi direktori berubah
+        try:
+            return self.index.get_serialized('list', lambda entries: json.dumps(dict(status='OK', data=sorted(entries))))
+        except Exception as e:
+            return json.dumps(dict(status='ERROR', data=str(e)))
+
     def get(self, params=[]):
         try:
             filename = params[0]
             if (filename == ''):
                 return dict(status='ERROR', data='Nama file tidak boleh kosong')
-            fp = open(f"{filename}", 'rb')
-            isifile = base64.b64encode(fp.read()).decode()
-            fp.close()
+            isifile = self.cache.get_or_load(file_key(filename, 'base64'), lambda: self._read_base64(filename))
+            return dict(status='OK', data_namafile=filename, data_file=isifile)
+        except Exception as e:
+            return dict(status='ERROR', data=str(e))
+
+    def _read_base64(self, filename):
+        return base64.b64encode(self.maps.get(filename).view).decode()
+
+    def get_raw(self, params=[]):
+        # sama seperti get, tetapi isi file dikembalikan tanpa base64, sebagai
+        # memoryview dari mapping file (tidak disalin ke bytes)
+        try:
+            filename = params[0]
+            if (filename == ''):
+                return dict(status='ERROR', data='Nama file tidak boleh kosong')
+            isifile = self.maps.get(filename).view
             return dict(status='OK', data_namafile=filename, data_file=isifile)
         except Exception as e:
             return dict(status='ERROR', data=str(e))
     
+    def get_stream(self, params=[]):
+        # file hanya dibuka, isinya dibaca bertahap oleh pemanggil
+        try:
+            filename = params[0]
+            if (filename == ''):
+                return dict(status='ERROR', data='Nama file tidak boleh kosong')
+            fp = open(f"{filename}", 'rb')
+            size = os.fstat(fp.fileno()).st_size
+            return dict(status='OK', data_namafile=filename, data_file=fp, data_size=size)
+        except Exception as e:
+            return dict(status='ERROR', data=str(e))
+
+    def get_mapped(self, params=[]):
+        # seperti get_stream, tetapi data_file adalah MappedFile yang dipakai bersama
+        try:
+            filename = params[0]
+            if (filename == ''):
+                return dict(status='ERROR', data='Nama file tidak boleh kosong')
+            mapped = self.maps.get(filename)
+            return dict(status='OK', data_namafile=filename, data_file=mapped, data_size=mapped.size)
+        except Exception as e:
+            return dict(status='ERROR', data=str(e))
+
+    def cache_stats(self, params=[]):
+        try:
+            return dict(status='OK', data=dict(self.cache.stats(), mmap=self.maps.stats()))
+        except Exception as e:
+            return dict(status='ERROR', data=str(e))
+
     def upload(self, params=[]):
         try:
             filename = params[0]
             if (filename == ''):
                 return dict(status='ERROR', data='Nama file tidak boleh kosong')
-            fp = open(filename, 'wb')
-            fp.write(base64.b64decode(params[1]))
+            return self.upload_raw([filename, base64.b64decode(params[1])])
+        except Exception as e:
+            return dict(status='ERROR', data=str(e))
+
+    def upload_begin(self, params=[]):
+        # params[1] opsional: True jika isi file akan dikirim dalam bentuk base64
+        try:
+            filename = params[0]
+            if (filename == ''):
+                return dict(status='ERROR', data='Nama file tidak boleh kosong')
+            encoded = len(params) > 1 and params[1]
+            writer = Base64UploadWriter(filename) if encoded else UploadWriter(filename)
+            return dict(status='OK', data=writer)
+        except Exception as e:
+            return dict(status='ERROR', data=str(e))
+
+    def upload_commit(self, params=[]):
+        try:
+            writer = params[0]
+            writer.commit()
+            self.cache.invalidate(writer.filename)
+            self.maps.invalidate(writer.filename)
+            self.index.update(writer.filename)
+            return dict(status='OK', data='File berhasil diupload')
+        except Exception as e:
+            return dict(status='ERROR', data=str(e))
+
+    def upload_raw(self, params=[]):
+        # params[1] berisi isi file dalam bentuk bytes (tanpa base64)
+        try:
+            filename = params[0]
+            if (filename == ''):
+                return dict(status='ERROR', data='Nama file tidak boleh kosong')
+            writer = UploadWriter(filename)
+            try:
+                writer.write(params[1])
+                writer.commit()
+            except Exception:
+                # file sementara (.part) tidak boleh tertinggal, sama seperti upload bertahap
+                writer.abort()
+                raise
+            self.cache.invalidate(filename)
+            self.maps.invalidate(filename)
+            self.index.update(filename)
             return dict(status='OK', data='File berhasil diupload')
         except Exception as e:
             return dict(status='ERROR', data=str(e))
@@ -52,6 +211,9 @@ class FileInterface:
             if (filename == ''):
                 return dict(status='ERROR', data='Nama file tidak boleh kosong')
             os.remove(filename)
+            self.cache.invalidate(filename)
+            self.maps.invalidate(filename)
+            self.index.remove(filename)
             return dict(status='OK', data='File berhasil dihapus')
         except Exception as e:
             return dict(status='ERROR', data=str(e))
@@ -1,8 +1,12 @@
+import base64
 import json
 import logging
 import shlex
+import struct
 
 from file_interface import FileInterface
+from file_cache import file_key
+from file_map import MappedFile
 
 """
 * class FileProtocol bertugas untuk memproses 
@@ -14,36 +18,140 @@ pada akhirnya akan diproses dalam bentuk string
 
 * class FileProtocol akan memproses data yang masuk dalam bentuk
 string
+
+* selain protokol teks, tersedia mode frame biner (lihat FRAME_HEADER)
+untuk client yang ingin mengirim/menerima isi file tanpa base64 dan JSON
 """
+
+# frame biner: magic (2 byte), opcode/status (1 byte), panjang nama file (2 byte),
+# panjang payload (8 byte), lalu nama file dan payload mentah.
+# byte pertama magic bukan karakter ASCII, sehingga server dapat membedakan
+# frame biner dari perintah teks lama hanya dari byte pertama pesan.
+FRAME_MAGIC = b'\xfbF'
+FRAME_HEADER = struct.Struct('!2sBHQ')
+
+OP_LIST = 1
+OP_GET = 2
+OP_UPLOAD = 3
+OP_DELETE = 4
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+# server penuh, koneksi ditolak sebelum perintah diproses (lihat admission.py)
+STATUS_BUSY = 2
+
+FRAME_OPCODES = {
+    OP_LIST: 'list',
+    OP_GET: 'get_raw',
+    OP_UPLOAD: 'upload_raw',
+    OP_DELETE: 'delete',
+}
+
+
+def pack_frame_header(opcode, filename='', payload_len=0):
+    namafile = filename.encode()
+    return FRAME_HEADER.pack(FRAME_MAGIC, opcode, len(namafile), payload_len) + namafile
+
+
+def pack_frame(opcode, filename='', payload=b''):
+    return pack_frame_header(opcode, filename, len(payload)) + payload
+
+
+def unpack_frame_header(header):
+    magic, opcode, name_len, payload_len = FRAME_HEADER.unpack_from(header)
+    if magic != FRAME_MAGIC:
+        raise ValueError(f"Invalid frame magic: {magic!r}")
+    return opcode, name_len, payload_len
+
+
+class StreamResponse:
+    """
+    respons yang isinya dibaca dari file per CHUNK_SIZE, sehingga memori
+    yang dipakai untuk satu transfer tidak bergantung pada ukuran file.
+    fileobj bisa berupa file biasa atau MappedFile (lihat file_map.py);
+    dari MappedFile potongannya berupa memoryview tanpa salinan
+    """
+    # kelipatan 3 agar setiap potongan base64 tidak membutuhkan padding
+    CHUNK_SIZE = 3 * 256 * 1024
+
+    def __init__(self, head, fileobj, size, encode_base64=False, tail=b''):
+        self.head = head
+        self.fileobj = fileobj
+        self.size = size
+        self.encode_base64 = encode_base64
+        self.tail = tail
+
+    def chunks(self):
+        try:
+            yield self.head
+            if isinstance(self.fileobj, MappedFile):
+                potongan = self.fileobj.chunks(self.CHUNK_SIZE)
+            else:
+                potongan = iter(lambda: self.fileobj.read(self.CHUNK_SIZE), b'')
+            for chunk in potongan:
+                yield base64.b64encode(chunk) if self.encode_base64 else chunk
+            if self.tail:
+                yield self.tail
+        finally:
+            self.close()
+
+    def send(self, connection):
+        if self.encode_base64 or isinstance(self.fileobj, MappedFile):
+            for chunk in self.chunks():
+                connection.sendall(chunk)
+            return
+        # tanpa base64, isi file bisa dikirim langsung dengan sendfile (zero-copy)
+        try:
+            connection.sendall(self.head)
+            if self.size:
+                connection.sendfile(self.fileobj, 0, self.size)
+            if self.tail:
+                connection.sendall(self.tail)
+        finally:
+            self.close()
+
+    def close(self):
+        self.fileobj.close()
+
+
 class FileProtocol:
+    # perintah teks yang boleh dipanggil client, method FileInterface lain hanya untuk internal
+    PERINTAH_TEKS = ('list', 'get', 'upload', 'delete', 'cache_stats')
+
     def __init__(self):
         self.file = FileInterface()
         
+    def parse_string(self, string_datamasuk=''):
+        if " " not in string_datamasuk:
+            c_request = string_datamasuk.strip().lower()
+            params = []
+        else:
+            parts = string_datamasuk.split(" ", 1)
+            c_request = parts[0].strip().lower()
+            
+            if len(parts) > 1:
+                if c_request == "upload":
+                    filename_and_content = parts[1].split(" ", 1)
+                    params = filename_and_content
+                else:
+                    try:
+                        params = shlex.split(parts[1])
+                    except Exception as e:
+                        logging.warning(f"Error parsing parameters with shlex: {str(e)}")
+                        params = parts[1].split()
+            else:
+                params = []
+        return c_request, params
+
     def proses_string(self, string_datamasuk=''):
         logging.warning(f"processing string of length: {len(string_datamasuk)}")
         try:
-            if " " not in string_datamasuk:
-                c_request = string_datamasuk.strip().lower()
-                params = []
-            else:
-                parts = string_datamasuk.split(" ", 1)
-                c_request = parts[0].strip().lower()
-                
-                if len(parts) > 1:
-                    if c_request == "upload":
-                        filename_and_content = parts[1].split(" ", 1)
-                        params = filename_and_content
-                    else:
-                        try:
-                            params = shlex.split(parts[1])
-                        except Exception as e:
-                            logging.warning(f"Error parsing parameters with shlex: {str(e)}")
-                            params = parts[1].split()
-                else:
-                    params = []
+            c_request, params = self.parse_string(string_datamasuk)
             
             logging.warning(f"processing request: {c_request} with {len(params)} parameters")
-            if hasattr(self.file, c_request):
+            if c_request == 'list':
+                return self.file.list_json(params)
+            if c_request in self.PERINTAH_TEKS and hasattr(self.file, c_request):
                 cl = getattr(self.file, c_request)(params)
                 return json.dumps(cl)
             else:
@@ -52,6 +160,95 @@ class FileProtocol:
             logging.warning(f"Error processing request: {str(e)}")
             return json.dumps(dict(status='ERROR', data=f'Error processing request: {str(e)}'))
 
+    def proses_get(self, params=[], binary=False):
+        # GET tanpa memuat seluruh file ke memori: hasilnya StreamResponse yang
+        # mengirim isi file per CHUNK_SIZE, atau bytes berisi pesan error.
+        # File yang muat di cache dikirim dari LRUCache sebagai bytes siap kirim
+        logging.warning(f"processing streaming get with {len(params)} parameters")
+        cache = self.file.cache
+        try:
+            key = file_key(params[0], 'binary' if binary else 'text')
+        except (IndexError, OSError):
+            key = None
+        if key is not None and cache.fits(self._response_size(key[2], binary)):
+            response = cache.get_or_load(key, lambda: self._load_get(params, binary))
+            if response is not None:
+                return response
+        return self._stream_get(params, binary)
+
+    def _response_size(self, size, binary):
+        return size if binary else (size + 2) // 3 * 4
+
+    def _load_get(self, params, binary):
+        # isi file diambil dari mapping, satu-satunya salinan adalah bytes yang disimpan di cache
+        response = self._stream_get(params, binary, mapped=True)
+        if not isinstance(response, StreamResponse):
+            return None
+        return b''.join(response.chunks())
+
+    def _stream_get(self, params, binary, mapped=False):
+        # binary dikirim dengan sendfile dari file yang dibuka per request; base64
+        # di-encode dari potongan mapping yang dipakai bersama (lihat file_map.py)
+        if mapped or not binary:
+            cl = self.file.get_mapped(params)
+        else:
+            cl = self.file.get_stream(params)
+        if cl['status'] != 'OK':
+            return self.format_result(cl, binary)
+
+        namafile = cl['data_namafile']
+        if binary:
+            head = pack_frame_header(STATUS_OK, namafile, cl['data_size'])
+            return StreamResponse(head, cl['data_file'], cl['data_size'])
+        # awalan JSON dibuat dengan json.dumps agar formatnya sama persis dengan get()
+        prefix = json.dumps(dict(status='OK', data_namafile=namafile, data_file=''))[:-2]
+        return StreamResponse(prefix.encode(), cl['data_file'], cl['data_size'],
+                              encode_base64=True, tail=b'"}\r\n\r\n')
+
+    def upload_begin(self, filename, binary=False):
+        # UPLOAD bertahap: hasilnya dict dengan writer di 'data' jika berhasil,
+        # isi file ditulis ke writer sambil diterima lalu diselesaikan dengan upload_finish
+        logging.warning(f"processing streaming upload of '{filename}'")
+        return self.file.upload_begin([filename, not binary])
+
+    def upload_finish(self, writer, binary=False):
+        cl = self.file.upload_commit([writer])
+        logging.warning(f"streaming upload of {writer.size} bytes finished with status {cl['status']}")
+        return self.format_result(cl, binary)
+
+    def format_result(self, cl, binary=False):
+        # hasil FileInterface (selain get) menjadi bytes siap kirim sesuai mode koneksi
+        if not binary:
+            return (json.dumps(cl) + "\r\n\r\n").encode()
+        status = STATUS_OK if cl['status'] == 'OK' else STATUS_ERROR
+        return pack_frame(status, '', str(cl['data']).encode())
+
+    def proses_frame(self, opcode, filename='', payload=b''):
+        # hasil berupa tuple (header, payload) agar payload besar tidak perlu
+        # disalin ulang hanya untuk digabung dengan header
+        logging.warning(f"processing frame opcode {opcode} for '{filename}' with payload of length: {len(payload)}")
+        try:
+            if opcode not in FRAME_OPCODES:
+                return self._frame(STATUS_ERROR, '', b'Unknown command')
+            if opcode == OP_LIST:
+                # JSON daftar file diambil dari DirectoryIndex, hanya dibuat ulang jika direktori berubah
+                payload = self.file.index.get_serialized('names', lambda entries: json.dumps(sorted(entries)).encode())
+                return self._frame(STATUS_OK, '', payload)
+            params = [filename, payload] if opcode == OP_UPLOAD else [filename]
+            cl = getattr(self.file, FRAME_OPCODES[opcode])(params)
+
+            if cl['status'] != 'OK':
+                return self._frame(STATUS_ERROR, '', str(cl['data']).encode())
+            if opcode == OP_GET:
+                return self._frame(STATUS_OK, cl['data_namafile'], cl['data_file'])
+            return self._frame(STATUS_OK, '', str(cl['data']).encode())
+        except Exception as e:
+            logging.warning(f"Error processing frame: {str(e)}")
+            return self._frame(STATUS_ERROR, '', f'Error processing request: {str(e)}'.encode())
+
+    def _frame(self, status, filename, payload):
+        return pack_frame_header(status, filename, len(payload)), payload
+
 
 if __name__=='__main__':
     fp = FileProtocol()
\ No newline at end of file
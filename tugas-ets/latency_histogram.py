@@ -0,0 +1,85 @@
+import math
+import threading
+
+"""
+* LatencyHistogram menyimpan latency dalam bucket log-linear seperti
+HdrHistogram: nilai dalam mikrodetik dikelompokkan per pangkat dua, dan
+setiap pangkat dua dibagi menjadi 2**SUB_BUCKET_BITS bucket, sehingga
+kesalahan relatif percentile paling besar sekitar 1/2**(SUB_BUCKET_BITS-1)
+(~1.6% untuk 7 bit) berapapun besar nilainya
+
+* memori sebanding dengan jumlah bucket yang terisi, bukan jumlah sampel,
+sehingga jutaan request tetap murah untuk direkam
+
+* percentile mengembalikan batas atas bucket (nilai tertinggi yang setara),
+jadi hasilnya tidak pernah lebih kecil dari latency sebenarnya
+"""
+
+SUB_BUCKET_BITS = 7
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _index(micros):
+        shift = max(0, micros.bit_length() - SUB_BUCKET_BITS)
+        return (shift << SUB_BUCKET_BITS) + (micros >> shift)
+
+    @staticmethod
+    def _upper(index):
+        shift = index >> SUB_BUCKET_BITS
+        sub = index & ((1 << SUB_BUCKET_BITS) - 1)
+        return ((sub + 1) << shift) - 1
+
+    def record(self, seconds):
+        micros = max(1, int(seconds * 1e6))
+        index = self._index(micros)
+        with self.lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.total += 1
+            self.sum += seconds
+            self.min = seconds if self.min is None else min(self.min, seconds)
+            self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other):
+        with self.lock:
+            for index, count in other.counts.items():
+                self.counts[index] = self.counts.get(index, 0) + count
+            self.total += other.total
+            self.sum += other.sum
+            if other.total:
+                self.min = other.min if self.min is None else min(self.min, other.min)
+                self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, p):
+        # latency (detik) yang tidak dilampaui oleh p persen sampel
+        with self.lock:
+            if not self.total:
+                return 0
+            target = max(1, math.ceil(self.total * p / 100.0))
+            seen = 0
+            for index in sorted(self.counts):
+                seen += self.counts[index]
+                if seen >= target:
+                    return min(self._upper(index) / 1e6, self.max)
+            return self.max
+
+    def mean(self):
+        return self.sum / self.total if self.total else 0
+
+    def summary(self, prefix='latency'):
+        return {
+            f'{prefix}_p50': self.percentile(50),
+            f'{prefix}_p90': self.percentile(90),
+            f'{prefix}_p99': self.percentile(99),
+            f'{prefix}_p999': self.percentile(99.9),
+            f'{prefix}_max': self.max or 0,
+            f'{prefix}_mean': self.mean(),
+        }
@@ -0,0 +1,110 @@
+"""
+* RecvBuffer adalah buffer penerimaan berbasis bytearray yang diisi langsung
+dengan socket.recv_into, sehingga data dari socket tidak perlu di-decode
+ke str lalu digabung ulang setiap kali recv
+
+* data yang sudah diproses tidak dihapus dari depan bytearray (yang berarti
+menyalin sisa buffer), tetapi cukup dengan memajukan posisi start.
+Ruang kosong baru dirapikan (compact) saat bagian belakang buffer penuh
+
+* pencarian terminator dilakukan bertahap: hanya bagian yang baru masuk
+(ditambah beberapa byte terakhir sebelumnya) yang diperiksa
+
+* buffer dimulai kecil (size, beberapa KB) agar koneksi idle tidak menahan
+memori. Selama recv selalu mengisi penuh ruang yang diminta (upload atau
+frame besar sedang mengalir), ukuran baca digandakan sampai max_recv dan
+buffer ikut membesar secara geometris. shrink() mengembalikan buffer ke
+ukuran awal setelah pesan besar selesai diproses
+"""
+
+
+class RecvBuffer:
+    def __init__(self, size=4096, max_recv=1024*1024):
+        self.initial_size = size
+        self.max_recv = max_recv
+        self.buf = bytearray(size)
+        # jumlah byte yang diminta per recv_from, tumbuh selama data terus mengalir
+        self.recv_size = size
+        self.start = 0
+        self.end = 0
+        # posisi absolut sampai mana terminator sudah dicari tanpa hasil
+        self.scanned = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def recv_from(self, sock, max_bytes=None):
+        # membaca dari socket langsung ke ruang kosong di belakang buffer,
+        # mengembalikan jumlah byte yang diterima (0 berarti koneksi ditutup)
+        want = max_bytes or self.recv_size
+        self._reserve(want)
+        with memoryview(self.buf)[self.end:self.end + want] as view:
+            n = sock.recv_into(view)
+        self.end += n
+        if n == want and max_bytes is None and self.recv_size < self.max_recv:
+            self.recv_size = min(self.recv_size * 2, self.max_recv)
+        return n
+
+    def feed(self, data):
+        self._reserve(len(data))
+        self.buf[self.end:self.end + len(data)] = data
+        self.end += len(data)
+
+    def find(self, terminator):
+        # posisi terminator relatif terhadap awal data, atau -1
+        mulai = max(self.start, self.scanned - len(terminator) + 1)
+        idx = self.buf.find(terminator, mulai, self.end)
+        if idx < 0:
+            self.scanned = self.end
+            return -1
+        return idx - self.start
+
+    def find_byte(self, char, offset=0):
+        idx = self.buf.find(char, self.start + offset, self.end)
+        return idx - self.start if idx >= 0 else -1
+
+    def view(self, n=None, offset=0):
+        # memoryview tanpa salinan, harus dilepas (release/with) sebelum recv_from berikutnya
+        mulai = self.start + offset
+        akhir = self.end if n is None else min(mulai + n, self.end)
+        return memoryview(self.buf)[mulai:akhir]
+
+    def peek(self, n, offset=0):
+        mulai = self.start + offset
+        return bytes(self.buf[mulai:min(mulai + n, self.end)])
+
+    def consume(self, n):
+        self.start = min(self.start + n, self.end)
+        if self.start == self.end:
+            self.start = self.end = self.scanned = 0
+        else:
+            self.scanned = max(self.scanned, self.start)
+
+    def _reserve(self, n):
+        # memastikan ada minimal n byte kosong di belakang buffer
+        if len(self.buf) - self.end >= n:
+            return
+        panjang = self.end - self.start
+        scanned = self.scanned - self.start
+        if self.start:
+            self.buf[:panjang] = self.buf[self.start:self.end]
+            self.start, self.end = 0, panjang
+            self.scanned = max(scanned, 0)
+        if len(self.buf) - self.end < n:
+            # digandakan sampai cukup, sehingga jumlah alokasi ulang tetap logaritmik
+            size = len(self.buf)
+            while size - self.end < n:
+                size *= 2
+            self.buf.extend(bytes(size - len(self.buf)))
+
+    def shrink(self):
+        # dipanggil saat koneksi kembali idle (misalnya setelah upload besar selesai);
+        # sisa data yang belum diproses ikut dipindah jika muat di buffer awal
+        if len(self.buf) <= self.initial_size or len(self) > self.initial_size // 2:
+            return
+        panjang = len(self)
+        buf = bytearray(self.initial_size)
+        buf[:panjang] = self.buf[self.start:self.end]
+        self.scanned = max(self.scanned - self.start, 0)
+        self.buf, self.start, self.end = buf, 0, panjang
+        self.recv_size = self.initial_size
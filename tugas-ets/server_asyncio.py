@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import concurrent.futures
+
+from file_protocol import FileProtocol, StreamResponse
+from client_handler import ClientHandler
+
+fp = FileProtocol()
+
+"""
+* server berbasis asyncio: semua koneksi dilayani oleh satu event loop,
+sehingga koneksi yang idle atau lambat tidak memakan satu worker
+
+* parsing pesan, akses disk dan encoding base64/JSON tetap memakai
+ClientHandler/FileProtocol yang sama dengan server_threadpool, tetapi
+dijalankan di ThreadPoolExecutor berukuran pool_size agar event loop tidak
+pernah terblokir
+"""
+
+RECV_SIZE = 1024*1024
+IDLE_TIMEOUT = 1800
+
+
+class QueuedClientHandler(ClientHandler):
+    # balasan tidak langsung dikirim ke socket, tetapi ditampung di outbox
+    # untuk dikirim oleh event loop
+    def __init__(self, address, fp):
+        super().__init__(None, address, fp)
+        self.outbox = []
+
+    def kirim(self, response):
+        self.outbox.append(response)
+
+    def feed(self, data):
+        self.buffer.feed(data)
+        try:
+            self.process_buffer()
+        finally:
+            outbox, self.outbox = self.outbox, []
+        return outbox
+
+
+class Server:
+    def __init__(self, ipaddress='0.0.0.0', port=8889, pool_size=5):
+        self.ipinfo = (ipaddress, port)
+        self.pool_size = pool_size
+        self.executor = None
+
+    async def handle_client(self, reader, writer):
+        address = writer.get_extra_info('peername')
+        logging.warning(f"handling connection from {address}")
+        loop = asyncio.get_running_loop()
+        # handler (dan RecvBuffer-nya) baru dibuat saat data pertama datang,
+        # koneksi yang hanya idle tidak memegang buffer apa pun
+        handler = None
+        try:
+            while True:
+                data = await asyncio.wait_for(reader.read(RECV_SIZE), IDLE_TIMEOUT)
+                if not data:
+                    break
+                if handler is None:
+                    handler = QueuedClientHandler(address, fp)
+                outbox = await loop.run_in_executor(self.executor, handler.feed, data)
+                for response in outbox:
+                    await self.kirim(writer, response)
+        except Exception as e:
+            logging.warning(f"Error: {str(e)}")
+        finally:
+            if handler is not None:
+                await loop.run_in_executor(self.executor, handler.abort_upload)
+            logging.warning(f"connection from {address} closed")
+            writer.close()
+
+    async def kirim(self, writer, response):
+        if not isinstance(response, StreamResponse):
+            writer.write(response)
+            await writer.drain()
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            if not response.encode_base64:
+                writer.write(response.head)
+                await writer.drain()
+                if response.size:
+                    await loop.sendfile(writer.transport, response.fileobj, 0, response.size)
+                return
+            # potongan base64 dibaca dan di-encode di executor satu per satu
+            chunks = response.chunks()
+            while True:
+                chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+                if chunk is None:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        finally:
+            response.close()
+
+    async def serve(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.pool_size)
+        server = await asyncio.start_server(self.handle_client, *self.ipinfo, backlog=1024)
+        logging.warning(f"server running on ip address {self.ipinfo} with asyncio and executor size {self.pool_size}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=False)
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            logging.warning("Server shutting down")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='File Server')
+    parser.add_argument('--port', type=int, default=6666, help='Server port (default: 6666)')
+    parser.add_argument('--pool-size', type=int, default=5, help='Executor size for disk I/O and encoding (default: 5)')
+    parser.add_argument('--cache-mb', type=int, default=256, help='GET content cache budget in MB, 0 disables it (default: 256)')
+    args = parser.parse_args()
+    fp.file.cache.max_bytes = args.cache_mb * 1024 * 1024
+
+    svr = Server(ipaddress='0.0.0.0', port=args.port, pool_size=args.pool_size)
+    svr.run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,265 @@
+import os
+import sys
+import time
+import shutil
+import signal
+import socket
+import logging
+import tempfile
+import threading
+import subprocess
+
+"""
+* ServerProcess menjalankan salah satu server (thread/process/asyncio)
+sebagai subprocess pada port bebas dengan pool size tertentu, menunggu
+sampai port bisa di-connect, lalu menghentikannya lagi setelah test selesai.
+Dengan begitu stress_test_run bisa menjalankan seluruh matriks tanpa restart
+manual, dan setiap konfigurasi mulai dari server yang baru (cache kosong)
+
+* server dijalankan di session/process group sendiri, sehingga worker
+process milik server_processpool ikut dihitung dan ikut dihentikan
+
+* pemakaian CPU dan memori dibaca dari /proc (Linux), dijumlahkan untuk semua
+process dalam process group server
+
+* ResourceSampler mengambil sampel /proc secara berkala selama satu test
+(CPU, RSS, jumlah thread, fd terbuka, context switch) dan meringkasnya
+menjadi kolom mean/peak. CPU per process yang mentok di sekitar 100%
+sementara jumlah thread banyak menandakan server terbatas oleh GIL
+"""
+
+SERVER_SCRIPTS = {
+    'thread': 'server_threadpool.py',
+    'process': 'server_processpool.py',
+    'asyncio': 'server_asyncio.py',
+}
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def free_port(host='127.0.0.1'):
+    # port ephemeral dari kernel; socket langsung ditutup lagi agar server bisa bind
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def group_pids(pgid):
+    pids = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # field setelah "(comm)": state ppid pgrp ...
+        fields = stat[stat.rfind(')') + 2:].split()
+        if int(fields[2]) == pgid:
+            pids.append(int(name))
+    return pids
+
+
+STATUS_FIELDS = {
+    'VmRSS': 'rss',
+    'VmHWM': 'hwm',
+    'Threads': 'threads',
+    'voluntary_ctxt_switches': 'ctx_voluntary',
+    'nonvoluntary_ctxt_switches': 'ctx_nonvoluntary',
+}
+
+
+def process_usage(pid, count_fds=False):
+    with open(f'/proc/{pid}/stat') as f:
+        stat = f.read()
+    fields = stat[stat.rfind(')') + 2:].split()
+    # utime dan stime adalah field ke-14 dan ke-15 pada /proc/pid/stat
+    usage = dict(cpu=(int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+                 rss=0, hwm=0, threads=0, ctx_voluntary=0, ctx_nonvoluntary=0)
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in STATUS_FIELDS:
+                value = int(value.split()[0])
+                # VmRSS/VmHWM dalam kB
+                usage[STATUS_FIELDS[name]] = value * 1024 if name.startswith('Vm') else value
+    if count_fds:
+        usage['fds'] = len(os.listdir(f'/proc/{pid}/fd'))
+    return usage
+
+
+def group_usage(pgid, count_fds=False):
+    # {pid: usage} untuk semua process dalam process group
+    result = {}
+    for pid in group_pids(pgid):
+        try:
+            result[pid] = process_usage(pid, count_fds)
+        except (OSError, IndexError, ValueError):
+            continue
+    return result
+
+
+class ServerProcess:
+    def __init__(self, server_type='thread', pool_size=5, port=None, extra_args=(), work_dir=None,
+                 log_file=None, ready_timeout=15):
+        if server_type not in SERVER_SCRIPTS:
+            raise ValueError(f"Unknown server type: {server_type}")
+        self.server_type = server_type
+        self.pool_size = pool_size
+        self.port = port
+        self.extra_args = list(extra_args)
+        # direktori kerja server = direktori yang dilayani; default direktori sementara yang dihapus saat stop
+        self.work_dir = work_dir
+        self.own_work_dir = work_dir is None
+        self.log_file = log_file
+        self.ready_timeout = ready_timeout
+        self.proc = None
+        self.log = None
+        # CPU terakhir yang terbaca per pid, agar CPU process yang sudah berhenti
+        # (misalnya worker yang di-restart) tetap terhitung
+        self.cpu_seen = {}
+
+    def start(self):
+        if self.port is None:
+            self.port = free_port()
+        if self.own_work_dir:
+            self.work_dir = tempfile.mkdtemp(prefix=f'ets_{self.server_type}_')
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), SERVER_SCRIPTS[self.server_type])
+        command = [sys.executable, script, '--port', str(self.port), '--pool-size', str(self.pool_size)]
+        command += self.extra_args
+        self.log = open(self.log_file, 'ab') if self.log_file else subprocess.DEVNULL
+        logging.info(f"Starting {self.server_type} server: {' '.join(command)} (cwd {self.work_dir})")
+        self.proc = subprocess.Popen(command, cwd=self.work_dir, stdout=self.log, stderr=subprocess.STDOUT,
+                                     start_new_session=True)
+        try:
+            self.wait_ready()
+        except Exception:
+            self.stop()
+            raise
+        return self
+
+    def wait_ready(self):
+        deadline = time.time() + self.ready_timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"{self.server_type} server exited with code {self.proc.returncode} during startup")
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=1):
+                    pass
+                logging.info(f"{self.server_type} server ready on port {self.port} (pid {self.proc.pid})")
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise TimeoutError(f"{self.server_type} server not ready on port {self.port} after {self.ready_timeout}s")
+
+    def usage(self):
+        # snapshot CPU (detik) dan memori (byte) seluruh process server saat ini
+        cpu = rss = hwm = 0
+        pids = group_usage(self.proc.pid)
+        for pid, usage in pids.items():
+            self.cpu_seen[pid] = usage['cpu']
+            cpu += usage['cpu']
+            rss += usage['rss']
+            hwm = max(hwm, usage['hwm'])
+        cpu += sum(c for pid, c in self.cpu_seen.items() if pid not in pids)
+        return dict(cpu=cpu, rss=rss, hwm=hwm, processes=len(pids), time=time.time())
+
+    def usage_delta(self, before):
+        # kolom CSV untuk pemakaian resource server selama satu test
+        after = self.usage()
+        elapsed = after['time'] - before['time']
+        cpu = after['cpu'] - before['cpu']
+        return {
+            'server_cpu_seconds': cpu,
+            'server_cpu_percent': 100.0 * cpu / elapsed if elapsed > 0 else 0,
+            'server_rss_mb': after['rss'] / 1024 / 1024,
+            'server_peak_rss_mb': after['hwm'] / 1024 / 1024,
+            'server_processes': after['processes'],
+        }
+
+    def stop(self, timeout=10):
+        if self.proc is not None and self.proc.poll() is None:
+            # SIGINT menjadi KeyboardInterrupt di server, yang menutup socket dan worker dengan rapi
+            try:
+                os.killpg(self.proc.pid, signal.SIGINT)
+                self.proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                logging.warning(f"{self.server_type} server did not stop after {timeout}s, killing it")
+            except ProcessLookupError:
+                pass
+        if self.proc is not None:
+            # sisa process dalam group (misalnya worker yang masih menunggu koneksi idle)
+            try:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+            self.proc.wait()
+            logging.info(f"{self.server_type} server on port {self.port} stopped")
+        if self.log not in (None, subprocess.DEVNULL):
+            self.log.close()
+        if self.own_work_dir and self.work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class ResourceSampler:
+    # sampel /proc setiap interval detik di thread terpisah selama satu test
+    METRICS = ('cpu_percent', 'process_cpu_percent', 'rss_mb', 'threads', 'fds',
+               'ctx_switches_per_sec', 'nonvoluntary_ctx_per_sec')
+
+    def __init__(self, server, interval=0.2):
+        self.server = server
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+        self.thread = None
+        self.previous = None
+
+    def start(self):
+        self.previous = (time.time(), group_usage(self.server.proc.pid, count_fds=True))
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        now, current = time.time(), group_usage(self.server.proc.pid, count_fds=True)
+        then, previous = self.previous
+        self.previous = (now, current)
+        elapsed = now - then
+        if elapsed <= 0 or not current:
+            return
+        # delta hanya untuk process yang ada di kedua snapshot
+        cpu = {pid: current[pid]['cpu'] - previous[pid]['cpu'] for pid in current if pid in previous}
+        voluntary = sum(current[pid]['ctx_voluntary'] - previous[pid]['ctx_voluntary'] for pid in cpu)
+        nonvoluntary = sum(current[pid]['ctx_nonvoluntary'] - previous[pid]['ctx_nonvoluntary'] for pid in cpu)
+        self.samples.append({
+            'cpu_percent': 100.0 * sum(cpu.values()) / elapsed,
+            'process_cpu_percent': 100.0 * max(cpu.values(), default=0) / elapsed,
+            'rss_mb': sum(u['rss'] for u in current.values()) / 1024 / 1024,
+            'threads': sum(u['threads'] for u in current.values()),
+            'fds': sum(u.get('fds', 0) for u in current.values()),
+            'ctx_switches_per_sec': (voluntary + nonvoluntary) / elapsed,
+            'nonvoluntary_ctx_per_sec': nonvoluntary / elapsed,
+        })
+
+    def stop(self):
+        # kolom CSV server_<metric>_mean dan server_<metric>_peak
+        self.stopped.set()
+        self.thread.join()
+        self.sample()
+        result = {'server_samples': len(self.samples)}
+        for metric in self.METRICS:
+            values = [sample[metric] for sample in self.samples]
+            result[f'server_{metric}_mean'] = sum(values) / len(values) if values else 0
+            result[f'server_{metric}_peak'] = max(values, default=0)
+        return result
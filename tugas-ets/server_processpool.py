@@ -1,75 +1,156 @@
 from socket import *
 import socket
 import logging
+import time
+import os
+import signal
 from file_protocol import FileProtocol
+from client_handler import handle_client as handle_client_connection
 import multiprocessing
-import concurrent.futures
 
 fp = FileProtocol()
 
+"""
+* server pre-fork: setiap worker process menjalankan accept loop sendiri
+pada listening socket yang sama (diwariskan dari process utama, atau
+dibuka sendiri dengan SO_REUSEPORT), sehingga socket koneksi tidak perlu
+di-pickle dan dikirim ke process lain
+
+* process utama hanya mengawasi worker dan menjalankan ulang worker yang mati
+
+* worker hanya memanggil accept saat sedang tidak melayani koneksi, jadi
+antrean koneksi yang menunggu adalah backlog listen di kernel; ukurannya
+diatur dengan --backlog
+"""
+
+PARENT_CHECK_INTERVAL = 1.0
+
 def handle_client(connection, address):
-    logging.warning(f"handling connection from {address}")
-    buffer = ""
+    handle_client_connection(connection, address, fp)
+
+
+def make_listen_socket(ipinfo, reuse_port=False, backlog=128):
+    my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    my_socket.bind(ipinfo)
+    my_socket.listen(backlog)
+    return my_socket
+
+
+def exit_with_parent(parent_pid):
+    # worker tidak boleh terus accept di port setelah process utama mati (misalnya kena SIGKILL),
+    # karena akan menghalangi server di-restart. Di Linux kernel mengirim SIGTERM ke worker
+    # saat parent mati (PR_SET_PDEATHSIG); hasil False berarti parent harus dicek sendiri
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        PR_SET_PDEATHSIG = 1
+        if libc.prctl(PR_SET_PDEATHSIG, signal.SIGTERM, 0, 0, 0) != 0:
+            return False
+    except (OSError, AttributeError):
+        return False
+    # parent bisa saja sudah mati sebelum prctl dipanggil
+    if os.getppid() != parent_pid:
+        os._exit(0)
+    return True
+
+
+def worker_loop(worker_id, listen_socket=None, ipinfo=None, backlog=128, parent_pid=None):
+    # listen_socket None berarti mode SO_REUSEPORT: worker membuka socket sendiri
+    if listen_socket is None:
+        listen_socket = make_listen_socket(ipinfo, reuse_port=True, backlog=backlog)
+    watch_parent = parent_pid is not None and not exit_with_parent(parent_pid)
+    if watch_parent:
+        # tanpa prctl: accept diberi timeout dan parent dicek setiap kali timeout
+        listen_socket.settimeout(PARENT_CHECK_INTERVAL)
+    logging.warning(f"worker {worker_id} accepting connections")
     try:
         while True:
-            data = connection.recv(1024*1024)
-            if not data:
-                break
-            buffer += data.decode()
-            while "\r\n\r\n" in buffer:
-                command, buffer = buffer.split("\r\n\r\n", 1)
-                hasil = fp.proses_string(command)
-                response = hasil + "\r\n\r\n"
-                connection.sendall(response.encode())
-    except Exception as e:
-        logging.warning(f"Error: {str(e)}")
+            try:
+                connection, client_address = listen_socket.accept()
+            except socket.timeout:
+                if os.getppid() != parent_pid:
+                    logging.warning(f"worker {worker_id}: parent process is gone, exiting")
+                    break
+                continue
+            logging.warning(f"worker {worker_id}: connection from {client_address}")
+            handle_client(connection, client_address)
+    except KeyboardInterrupt:
+        pass
     finally:
-        logging.warning(f"connection from {address} closed")
-        connection.close()
+        listen_socket.close()
 
 
 class Server:
-    def __init__(self, ipaddress='0.0.0.0', port=8889, pool_size=5):
+    def __init__(self, ipaddress='0.0.0.0', port=8889, pool_size=5, reuse_port=False, backlog=128):
         self.ipinfo = (ipaddress, port)
         self.pool_size = pool_size
-        self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.reuse_port = reuse_port
+        self.backlog = backlog
+        self.my_socket = None
+        self.workers = {}
+
+    def start_worker(self, worker_id):
+        if self.reuse_port:
+            args = (worker_id, None, self.ipinfo, self.backlog, os.getpid())
+        else:
+            args = (worker_id, self.my_socket, None, self.backlog, os.getpid())
+        p = multiprocessing.Process(target=worker_loop, args=args, daemon=True)
+        p.start()
+        self.workers[worker_id] = p
 
     def run(self):
-        logging.warning(f"server running on ip address {self.ipinfo} with process pool size {self.pool_size}")
-        self.my_socket.bind(self.ipinfo)
-        self.my_socket.listen(1)
-        
-        with concurrent.futures.ProcessPoolExecutor(max_workers=self.pool_size) as executor:
-            try:
-                while True:
-                    connection, client_address = self.my_socket.accept()
-                    logging.warning(f"connection from {client_address}")
-                    
-                    executor.submit(handle_client, connection, client_address)
-            except KeyboardInterrupt:
-                logging.warning("Server shutting down")
-            except Exception as e:
-                logging.warning(f"Error in server: {str(e)}")
-            finally:
-                if self.my_socket:
-                    self.my_socket.close()
+        mode = "SO_REUSEPORT" if self.reuse_port else "shared listening socket"
+        logging.warning(f"server running on ip address {self.ipinfo} with {self.pool_size} worker processes ({mode})")
+        if not self.reuse_port:
+            self.my_socket = make_listen_socket(self.ipinfo, backlog=self.backlog)
+
+        try:
+            for worker_id in range(self.pool_size):
+                self.start_worker(worker_id)
+            while True:
+                time.sleep(1)
+                for worker_id, p in list(self.workers.items()):
+                    if not p.is_alive():
+                        logging.warning(f"worker {worker_id} (pid {p.pid}) exited with code {p.exitcode}, restarting")
+                        self.start_worker(worker_id)
+        except KeyboardInterrupt:
+            logging.warning("Server shutting down")
+        except Exception as e:
+            logging.warning(f"Error in server: {str(e)}")
+        finally:
+            for p in self.workers.values():
+                p.terminate()
+            for p in self.workers.values():
+                p.join()
+            if self.my_socket:
+                self.my_socket.close()
 
 
 def main():
     import argparse
     parser = argparse.ArgumentParser(description='File Server')
     parser.add_argument('--port', type=int, default=6666, help='Server port (default: 6666)')
-    parser.add_argument('--pool-size', type=int, default=5, help='Thread pool size (default: 5)')
+    parser.add_argument('--pool-size', type=int, default=5, help='Number of worker processes (default: 5)')
+    parser.add_argument('--reuse-port', action='store_true',
+                        help='Let every worker bind its own socket with SO_REUSEPORT instead of sharing one')
+    parser.add_argument('--cache-mb', type=int, default=256,
+                        help='Total GET content cache budget in MB, split evenly across the worker processes '
+                             '(each gets cache-mb / pool-size); 0 disables it (default: 256)')
+    parser.add_argument('--backlog', type=int, default=128, help='Listen backlog per socket (default: 128)')
     args = parser.parse_args()
-    
-    svr = Server(ipaddress='0.0.0.0', port=args.port, pool_size=args.pool_size)
-    svr.run()
-    svr = Server(ipaddress='0.0.0.0', port=6666, pool_size=5)
+    # setiap worker mewarisi LRUCache sendiri (copy-on-write) dan mengisinya dengan salinan
+    # pribadi, jadi budget dibagi rata agar total memori cache tetap cache-mb
+    fp.file.cache.max_bytes = args.cache_mb * 1024 * 1024 // max(args.pool_size, 1)
+
+    svr = Server(ipaddress='0.0.0.0', port=args.port, pool_size=args.pool_size, reuse_port=args.reuse_port,
+                 backlog=args.backlog)
     svr.run()
 
 
 if __name__ == "__main__":
     multiprocessing.freeze_support()
     logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
-    main()
\ No newline at end of file
+    main()
@@ -2,37 +2,24 @@ from socket import *
 import socket
 import logging
 from file_protocol import FileProtocol
+from client_handler import handle_client as handle_client_connection, reject_client
+from admission import AdmissionController
 import concurrent.futures
 import sys
 
 fp = FileProtocol()
 
 def handle_client(connection, address):
-    logging.warning(f"handling connection from {address}")
-    buffer = ""
-    try:
-        connection.settimeout(1800)
-        while True:
-            data = connection.recv(1024*1024)
-            if not data:
-                break
-            buffer += data.decode()
-            while "\r\n\r\n" in buffer:
-                command, buffer = buffer.split("\r\n\r\n", 1)
-                hasil = fp.proses_string(command)
-                response = hasil + "\r\n\r\n"
-                connection.sendall(response.encode())
-    except Exception as e:
-        logging.warning(f"Error: {str(e)}")
-    finally:
-        logging.warning(f"connection from {address} closed")
-        connection.close()
+    handle_client_connection(connection, address, fp, timeout=1800)
 
 
 class Server:
-    def __init__(self, ipaddress='0.0.0.0', port=8889, pool_size=5):
+    def __init__(self, ipaddress='0.0.0.0', port=8889, pool_size=5, backlog=128, max_pending=64):
         self.ipinfo = (ipaddress, port)
         self.pool_size = pool_size
+        self.backlog = backlog
+        # paling banyak pool_size koneksi dilayani dan max_pending menunggu, sisanya mendapat BUSY
+        self.admission = AdmissionController(pool_size, max_pending, reject=reject_client)
         self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         
@@ -41,7 +28,7 @@ class Server:
     def run(self):
         logging.warning(f"server running on ip address {self.ipinfo} with thread pool size {self.pool_size}")
         self.my_socket.bind(self.ipinfo)
-        self.my_socket.listen(5)
+        self.my_socket.listen(self.backlog)
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.pool_size) as executor:
             try:
@@ -49,9 +36,9 @@ class Server:
                     connection, client_address = self.my_socket.accept()
                     logging.warning(f"connection from {client_address}")
                     
-                    executor.submit(handle_client, connection, client_address)
+                    self.admission.submit(executor.submit, handle_client, connection, client_address)
             except KeyboardInterrupt:
-                logging.warning("Server shutting down")
+                logging.warning(f"Server shutting down, admission stats: {self.admission.stats()}")
             finally:
                 if self.my_socket:
                     self.my_socket.close()
@@ -62,9 +49,15 @@ def main():
     parser = argparse.ArgumentParser(description='File Server')
     parser.add_argument('--port', type=int, default=6666, help='Server port (default: 6666)')
     parser.add_argument('--pool-size', type=int, default=5, help='Thread pool size (default: 5)')
+    parser.add_argument('--cache-mb', type=int, default=256, help='GET content cache budget in MB, 0 disables it (default: 256)')
+    parser.add_argument('--backlog', type=int, default=128, help='Listen backlog (default: 128)')
+    parser.add_argument('--max-pending', type=int, default=64,
+                        help='Accepted connections allowed to wait for a worker before new ones get BUSY (default: 64)')
     args = parser.parse_args()
+    fp.file.cache.max_bytes = args.cache_mb * 1024 * 1024
     
-    svr = Server(ipaddress='0.0.0.0', port=args.port, pool_size=args.pool_size)
+    svr = Server(ipaddress='0.0.0.0', port=args.port, pool_size=args.pool_size,
+                 backlog=args.backlog, max_pending=args.max_pending)
     svr.run()
 
 
@@ -4,19 +4,197 @@ import base64
 import logging
 import os
 import time
+import random
 import statistics
 import csv
+import queue
+import threading
+import contextlib
 import concurrent.futures
-from collections import defaultdict
+from collections import defaultdict, deque
+
+from latency_histogram import LatencyHistogram
+from file_protocol import (
+    FRAME_HEADER, OP_LIST, OP_GET, OP_UPLOAD, OP_DELETE, STATUS_OK, STATUS_BUSY,
+    pack_frame_header, unpack_frame_header,
+)
 
 logger = logging.getLogger(__name__)
 
+class ClientSession:
+    """
+    satu koneksi TCP yang dipakai untuk banyak perintah. Server membaca
+    perintah satu per satu dari buffer koneksi, sehingga beberapa perintah
+    bisa dikirim sekaligus (pipelining) lalu balasannya dibaca berurutan.
+    Pipelining cocok untuk perintah dengan balasan kecil seperti LIST; untuk
+    GET file besar jumlah perintah yang belum dibaca sebaiknya kecil
+    """
+    FRAME_OPCODES = {'LIST': OP_LIST, 'GET': OP_GET, 'UPLOAD': OP_UPLOAD, 'DELETE': OP_DELETE}
+
+    def __init__(self, server_address=('localhost', 6666), binary=False, timeout=600):
+        self.server_address = server_address
+        self.binary = binary
+        self.timeout = timeout
+        self.sock = None
+        self.buffer = bytearray()
+        # opcode perintah yang balasannya belum dibaca (mode biner)
+        self.pending = deque()
+        self.connect_time = 0
+
+    def connect(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        start_connect = time.time()
+        try:
+            sock.connect(self.server_address)
+        except Exception:
+            sock.close()
+            raise
+        self.connect_time = time.time() - start_connect
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        logger.debug(f"Connection established to {self.server_address} in {self.connect_time:.2f}s")
+        self.sock = sock
+        return self
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def send(self, command_str, payload=b''):
+        # pada mode biner, command_str hanya berisi "PERINTAH namafile" dan isi
+        # file untuk UPLOAD dikirim mentah lewat payload
+        if not self.binary:
+            self.sock.sendall(command_str.encode())
+            self.sock.sendall("\r\n\r\n".encode())
+            return
+
+        parts = command_str.split(" ", 1)
+        opcode = self.FRAME_OPCODES.get(parts[0].upper())
+        if opcode is None:
+            raise ValueError(f'Unknown command: {parts[0]}')
+        filename = parts[1] if len(parts) > 1 else ''
+        self.sock.sendall(pack_frame_header(opcode, filename, len(payload)))
+        if payload:
+            self.sock.sendall(payload)
+        self.pending.append(opcode)
+
+    def receive(self):
+        # membaca satu balasan, sisa data balasan berikutnya tetap di buffer
+        if self.binary:
+            return self._receive_frame()
+
+        scan_from = 0
+        while True:
+            end = self.buffer.find(b"\r\n\r\n", scan_from)
+            if end >= 0:
+                break
+            scan_from = max(0, len(self.buffer) - 3)
+            data = self.sock.recv(1024*1024)
+            if not data:
+                raise ConnectionError("Connection closed by server prematurely.")
+            self.buffer += data
+
+        json_response_part = bytes(self.buffer[:end])
+        del self.buffer[:end + 4]
+        try:
+            return json.loads(json_response_part.decode())
+        except UnicodeDecodeError as e:
+            logger.error(f"Unicode decode error: {e}. Received data (partial): {json_response_part[-100:]}")
+            return {'status': 'ERROR', 'data': f'Unicode decode error: {e}'}
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON decode error: {e}. Raw response part: {json_response_part[:500]}") # Log sebagian kecil respons
+            return {'status': 'ERROR', 'data': f'JSON decode error: {e}'}
+
+    def request(self, command_str, payload=b''):
+        self.send(command_str, payload)
+        return self.receive()
+
+    def pipeline(self, commands):
+        # commands berisi string perintah atau tuple (perintah, payload)
+        for command in commands:
+            if isinstance(command, tuple):
+                self.send(*command)
+            else:
+                self.send(command)
+        return [self.receive() for _ in commands]
+
+    def _receive_frame(self):
+        opcode = self.pending.popleft()
+        header = self._recv_exact(FRAME_HEADER.size)
+        status, name_len, payload_len = unpack_frame_header(header)
+        data_namafile = self._recv_exact(name_len).decode()
+        body = self._recv_exact(payload_len)
+
+        if status == STATUS_BUSY:
+            return {'status': 'BUSY', 'data': body.decode(errors='replace')}
+        if status != STATUS_OK:
+            return {'status': 'ERROR', 'data': body.decode(errors='replace')}
+        if opcode == OP_GET:
+            return {'status': 'OK', 'data_namafile': data_namafile, 'data_file': body}
+        if opcode == OP_LIST:
+            return {'status': 'OK', 'data': json.loads(body)}
+        return {'status': 'OK', 'data': body.decode()}
+
+    def _recv_exact(self, size):
+        buf = bytearray(size)
+        view = memoryview(buf)
+        received = 0
+        while received < size:
+            n = self.sock.recv_into(view[received:], min(size - received, 1024*1024))
+            if n == 0:
+                raise ConnectionError("Connection closed by server prematurely.")
+            received += n
+        return bytes(buf) if size else b''
+
+
+class ConnectionPool:
+    # paling banyak size koneksi terbuka; koneksi dikembalikan ke pool setelah
+    # dipakai, dan dibuang jika terjadi error di tengah perintah
+    def __init__(self, server_address=('localhost', 6666), binary=False, size=50):
+        self.server_address = server_address
+        self.binary = binary
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    @contextlib.contextmanager
+    def session(self):
+        with self.slots:
+            try:
+                session = self.idle.get_nowait()
+            except queue.Empty:
+                session = ClientSession(self.server_address, self.binary).connect()
+            try:
+                yield session
+            except BaseException:
+                session.close()
+                raise
+            self.idle.put(session)
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
 class StressTestClient:
-    def __init__(self, server_address=('localhost', 6666)):
+    def __init__(self, server_address=('localhost', 6666), binary=False, persistent=False):
         self.server_address = server_address
-        self.results = {'upload': [], 'download': [], 'list': []}
-        self.success_count = {'upload': 0, 'download': 0, 'list': 0}
-        self.fail_count = {'upload': 0, 'download': 0, 'list': 0}
+        self.binary = binary
+        # persistent: operasi memakai koneksi dari ConnectionPool, bukan koneksi baru per operasi
+        self.persistent = persistent
+        self.pool = None
+        # (perintah, payload) UPLOAD per file, di-encode sekali dan dipakai ulang semua worker
+        self.payloads = {}
+        self.reset_counters()
         
         if not os.path.exists('files'):
             os.makedirs('files')
@@ -41,49 +219,13 @@ class StressTestClient:
         logger.info(f"Test file generated: {filepath}")
         return filepath
 
-    def send_command(self, command_str=""):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(600) # 10 menit timeout
+    def send_command(self, command_str="", payload=b''):
         try:
-            start_connect = time.time()
-            sock.connect(self.server_address)
-            connect_time = time.time() - start_connect
-            logger.debug(f"Connection established to {self.server_address} in {connect_time:.2f}s")
-            
-            chunks = [command_str[i:i+65536] for i in range(0, len(command_str), 65536)]
-            for chunk in chunks:
-                sock.sendall((chunk).encode())
-            
-            sock.sendall("\r\n\r\n".encode())
-            
-            data_received = "" 
-            while True:
-                try:
-                    data = sock.recv(1024*1024) 
-                    if data:
-                        data_received += data.decode()
-                        if "\r\n\r\n" in data_received:
-                            break
-                    else:
-                        logger.warning("Connection closed by server prematurely.")
-                        break 
-                except socket.timeout:
-                    logger.error("Socket timeout while receiving data")
-                    return {'status': 'ERROR', 'data': 'Socket timeout while receiving data'}
-                except UnicodeDecodeError as e:
-                    logger.error(f"Unicode decode error: {e}. Received data (partial): {data_received[-100:]}")
-                    return {'status': 'ERROR', 'data': f'Unicode decode error: {e}'}
-
-            
-            json_response_part = data_received.split("\r\n\r\n", 1)[0]
-            
-            try:
-                hasil = json.loads(json_response_part)
-                return hasil
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error: {e}. Raw response part: {json_response_part[:500]}") # Log sebagian kecil respons
-                return {'status': 'ERROR', 'data': f'JSON decode error: {e}'}
-
+            if self.persistent:
+                with self.get_pool().session() as session:
+                    return session.request(command_str, payload)
+            with ClientSession(self.server_address, self.binary).connect() as session:
+                return session.request(command_str, payload)
         except socket.timeout as e:
             logger.error(f"Socket timeout: {str(e)}")
             return {'status': 'ERROR', 'data': f'Socket timeout: {str(e)}'}
@@ -93,8 +235,31 @@ class StressTestClient:
         except Exception as e:
             logger.error(f"Error in send_command: {str(e)}")
             return {'status': 'ERROR', 'data': str(e)}
-        finally:
-            sock.close()
+
+    def get_pool(self):
+        if self.pool is None:
+            self.pool = ConnectionPool(self.server_address, self.binary)
+        return self.pool
+
+    def __getstate__(self):
+        # pool berisi socket dan lock yang tidak bisa dikirim ke ProcessPoolExecutor,
+        # setiap process membuat pool sendiri
+        state = self.__dict__.copy()
+        state['pool'] = None
+        state['payloads'] = {}
+        return state
+
+    def upload_payload(self, file_path):
+        if file_path not in self.payloads:
+            filename = os.path.basename(file_path)
+            with open(file_path, 'rb') as fp:
+                file_content_bytes = fp.read()
+            if self.binary:
+                self.payloads[file_path] = (f"UPLOAD {filename}", file_content_bytes)
+            else:
+                file_content_b64 = base64.b64encode(file_content_bytes).decode('ascii')
+                self.payloads[file_path] = (f"UPLOAD {filename} {file_content_b64}", b'')
+        return self.payloads[file_path]
 
     def perform_upload(self, file_path, worker_id):
         start_time = time.time()
@@ -103,14 +268,11 @@ class StressTestClient:
         
         try:
             logger.info(f"Worker {worker_id}: Starting upload of {filename} ({file_size/1024/1024:.2f} MB)")
-            
-            with open(file_path, 'rb') as fp:
-                file_content_bytes = fp.read()
-            file_content_b64 = base64.b64encode(file_content_bytes).decode('ascii')
-            
-            command_str = f"UPLOAD {filename} {file_content_b64}"
-            
-            result = self.send_command(command_str)
+
+            # membaca dan meng-encode file tidak ikut diukur, hanya waktu kirim dan balasan server
+            command_str, payload = self.upload_payload(file_path)
+            start_time = time.time()
+            result = self.send_command(command_str, payload)
             
             end_time = time.time()
             duration = end_time - start_time
@@ -150,8 +312,11 @@ class StressTestClient:
             
             if result.get('status') == 'OK' and 'data_file' in result:
                 try:
-                    file_content_b64 = result['data_file']
-                    file_content_bytes = base64.b64decode(file_content_b64)
+                    if self.binary:
+                        file_content_bytes = result['data_file']
+                    else:
+                        file_content_b64 = result['data_file']
+                        file_content_bytes = base64.b64decode(file_content_b64)
                 except Exception as e:
                     logger.error(f"Worker {worker_id}: Error decoding/processing downloaded file content for {filename}: {e}")
                     self.fail_count['download'] += 1
@@ -237,15 +402,157 @@ class StressTestClient:
                 'status': 'ERROR', 'error': str(e)
             }
 
+    def perform_session(self, worker_id, requests=100, pipeline_depth=1, command_str="LIST"):
+        # satu koneksi untuk semua request, sehingga waktu connect terpisah dari
+        # waktu pemrosesan di server; pipeline_depth perintah dikirim sebelum balasannya dibaca
+        start_time = time.time()
+        done = 0
+        ok = 0
+        try:
+            with ClientSession(self.server_address, self.binary).connect() as session:
+                start_requests = time.time()
+                while done < requests:
+                    batch = min(pipeline_depth, requests - done)
+                    results = session.pipeline([command_str] * batch)
+                    ok += sum(1 for r in results if r.get('status') == 'OK')
+                    done += batch
+                elapsed = time.time() - start_requests
+                connect_time = session.connect_time
+
+            requests_per_sec = done / elapsed if elapsed > 0 else 0
+            if ok == done:
+                logger.info(f"Worker {worker_id}: Session successful - {done} requests (depth {pipeline_depth}) "
+                            f"in {elapsed:.2f}s - {requests_per_sec:.1f} req/s, connect {connect_time*1000:.2f}ms")
+                self.success_count['session'] += 1
+                status_to_return = 'OK'
+            else:
+                logger.error(f"Worker {worker_id}: Session had {done - ok} failed requests out of {done}")
+                self.fail_count['session'] += 1
+                status_to_return = 'ERROR'
+            return {
+                'worker_id': worker_id, 'operation': 'session', 'duration': time.time() - start_time,
+                'connect_time': connect_time, 'requests': done, 'ok_requests': ok,
+                'requests_per_sec': requests_per_sec, 'status': status_to_return
+            }
+        except Exception as e:
+            logger.error(f"Worker {worker_id}: Session exception after {done} requests: {str(e)}", exc_info=True)
+            self.fail_count['session'] += 1
+            return {
+                'worker_id': worker_id, 'operation': 'session', 'duration': time.time() - start_time,
+                'requests': done, 'ok_requests': ok, 'status': 'ERROR', 'error': str(e)
+            }
+
+    def parse_mix(self, mix):
+        # "list=70,get=25,upload=5" -> [('list', 70.0), ('get', 25.0), ('upload', 5.0)]
+        weights = []
+        for item in mix.split(','):
+            name, _, weight = item.strip().partition('=')
+            name = name.strip().lower()
+            if name not in ('list', 'get', 'upload'):
+                raise ValueError(f"Unknown operation in mix: {name}")
+            weights.append((name, float(weight) if weight else 1.0))
+        return weights
+
+    def run_open_loop(self, target_rps, duration_s, mix='list=1', file_size_mb=1, concurrency=64, seed=None):
+        """
+        open loop: request dijadwalkan pada laju tetap (target_rps) selama
+        duration_s detik, tidak menunggu request sebelumnya selesai. Latency
+        dihitung dari waktu yang dijadwalkan, bukan dari saat request benar-benar
+        dikirim, sehingga antrean akibat server yang lambat (atau semua
+        concurrency worker sedang sibuk) ikut terukur (coordinated omission)
+        """
+        self.reset_counters()
+        weights = self.parse_mix(mix)
+        names = [name for name, _ in weights]
+        rng = random.Random(seed)
+
+        test_file = None
+        upload_command = None
+        if 'get' in names or 'upload' in names:
+            test_file = self.generate_test_file(file_size_mb)
+            # payload di-encode sekali di awal, bukan di setiap request
+            upload_command = self.upload_payload(test_file)
+            if 'get' in names and self.send_command(*upload_command).get('status') != 'OK':
+                logger.error("Failed to upload test file to server for open-loop GET requests")
+                return None
+        commands = {'list': ("LIST", b''), 'get': (f"GET {test_file and os.path.basename(test_file)}", b''),
+                    'upload': upload_command}
+
+        histograms = {name: LatencyHistogram() for name in names}
+        overall = LatencyHistogram()
+        # jumlah request selesai per detik sejak awal test
+        timeline = defaultdict(int)
+        lock = threading.Lock()
+
+        def do_request(name, scheduled, start):
+            result = self.send_command(*commands[name])
+            finished = time.perf_counter()
+            latency = finished - scheduled
+            histograms[name].record(latency)
+            overall.record(latency)
+            with lock:
+                timeline[int(finished - start)] += 1
+                if result.get('status') == 'OK':
+                    self.success_count[name] += 1
+                else:
+                    self.fail_count[name] += 1
+
+        total_requests = int(target_rps * duration_s)
+        logger.info(f"Starting open-loop test: {target_rps} req/s for {duration_s}s ({total_requests} requests), "
+                    f"mix={mix}, concurrency={concurrency}")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            start = time.perf_counter()
+            for i in range(total_requests):
+                scheduled = start + i / target_rps
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                name = rng.choices(names, weights=[w for _, w in weights])[0]
+                executor.submit(do_request, name, scheduled, start)
+        elapsed = time.perf_counter() - start
+
+        success = sum(self.success_count.values())
+        fail = sum(self.fail_count.values())
+        stats = {
+            'operation': 'open_loop',
+            'file_size_mb': file_size_mb if test_file else 'N/A',
+            'client_pool_size': concurrency,
+            'executor_type': 'thread',
+            'protocol': 'binary' if self.binary else 'text',
+            'success_count': success,
+            'fail_count': fail,
+            'total_ops': success + fail,
+            'target_rps': target_rps,
+            'duration_s': duration_s,
+            'mix': mix,
+            'achieved_rps': success / elapsed if elapsed > 0 else 0,
+        }
+        stats.update(overall.summary())
+        for name in names:
+            stats.update(histograms[name].summary(f'{name}_latency'))
+        seconds = max(timeline) + 1 if timeline else 0
+        stats['throughput_timeline'] = ' '.join(str(timeline.get(t, 0)) for t in range(seconds))
+
+        logger.info(f"Open-loop test complete: {success} succeeded, {fail} failed, "
+                    f"achieved {stats['achieved_rps']:.1f} req/s of {target_rps} target")
+        logger.info(f"Latency p50={stats['latency_p50']*1000:.2f}ms p90={stats['latency_p90']*1000:.2f}ms "
+                    f"p99={stats['latency_p99']*1000:.2f}ms p99.9={stats['latency_p999']*1000:.2f}ms")
+        return stats
+
     def reset_counters(self):
         self.success_count = defaultdict(int)
         self.fail_count = defaultdict(int)
         self.results = defaultdict(list)
 
-    def run_stress_test(self, operation, file_size_mb, client_pool_size, executor_type='thread'):
+    def run_stress_test(self, operation, file_size_mb, client_pool_size, executor_type='thread',
+                        session_requests=100, pipeline_depth=1, target_rps=50, duration_s=10, mix='list=1'):
+        if operation == 'open_loop':
+            # client_pool_size menjadi batas request yang berjalan bersamaan
+            return self.run_open_loop(target_rps, duration_s, mix, file_size_mb, client_pool_size)
+
         self.reset_counters()
         
-        if operation not in ['upload', 'download', 'list']:
+        if operation not in ['upload', 'download', 'list', 'session']:
             logger.error(f"Invalid operation: {operation}")
             return
             
@@ -267,48 +574,57 @@ class StressTestClient:
                 return None
             self.reset_counters()
 
-        if executor_type == 'thread':
-            executor_class = concurrent.futures.ThreadPoolExecutor
-        elif executor_type == 'process':
-            executor_class = concurrent.futures.ProcessPoolExecutor
+        # argumen task: path file untuk upload, nama file untuk download
+        if operation == 'upload':
+            argument = test_file
+            self.upload_payload(test_file)
+        elif operation == 'download':
+            argument = os.path.basename(test_file)
         else:
+            argument = None
+
+        if executor_type not in ('thread', 'process'):
             logger.error(f"Invalid executor type: {executor_type}. Defaulting to 'thread'.")
-            executor_class = concurrent.futures.ThreadPoolExecutor
-        
+            executor_type = 'thread'
+        if executor_type == 'process':
+            # client tidak di-pickle ke setiap task: setiap worker process membuat
+            # client sendiri sekali lewat initializer, lengkap dengan koneksi dan payload
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=client_pool_size, initializer=init_process_worker,
+                initargs=(self.server_address, self.binary, test_file if operation == 'upload' else None,
+                          self.persistent, operation != 'session'))
+            task = run_process_task
+        else:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=client_pool_size)
+            task = self.run_task
+
         all_results_for_current_test = []
-        
-        with executor_class(max_workers=client_pool_size) as executor:
-            futures = []
-            
-            for i in range(client_pool_size):
-                if operation == 'upload':
-                    if not test_file:
-                        logger.error("Test file not available for upload operation.")
-                        continue
-                    futures.append(executor.submit(self.perform_upload, test_file, i))
-                elif operation == 'download':
-                    if not test_file:
-                        logger.error("Test file not available on server for download operation.")
-                        continue
-                    file_name_to_download = os.path.basename(test_file)
-                    futures.append(executor.submit(self.perform_download, file_name_to_download, i))
-                elif operation == 'list':
-                    futures.append(executor.submit(self.perform_list, i))
-            
+        failed_tasks = 0
+        wall_start = time.time()
+
+        with executor:
+            futures = [executor.submit(task, operation, i, argument, session_requests, pipeline_depth)
+                       for i in range(client_pool_size)]
+
             for future in concurrent.futures.as_completed(futures):
                 try:
                     result = future.result()
                     if result:
                         all_results_for_current_test.append(result)
                 except Exception as e:
+                    failed_tasks += 1
                     logger.error(f"Worker task failed with exception: {str(e)}", exc_info=True)
+        wall_time = time.time() - wall_start
 
         successful_ops = [r for r in all_results_for_current_test if r and r.get('status') == 'OK']
         durations = [r['duration'] for r in successful_ops if 'duration' in r]
         throughputs = [r['throughput'] for r in successful_ops if r.get('throughput', 0) > 0 and 'throughput' in r]
         
-        current_success_count = self.success_count[operation]
-        current_fail_count = self.fail_count[operation]
+        # dihitung dari hasil yang dikembalikan worker; counter milik worker process tidak terlihat di sini
+        current_success_count = len(successful_ops)
+        current_fail_count = len(all_results_for_current_test) - current_success_count + failed_tasks
+        self.success_count[operation] = current_success_count
+        self.fail_count[operation] = current_fail_count
         total_ops = current_success_count + current_fail_count
 
         if not successful_ops:
@@ -318,6 +634,7 @@ class StressTestClient:
                 'file_size_mb': file_size_mb if operation != 'list' else 'N/A',
                 'client_pool_size': client_pool_size,
                 'executor_type': executor_type,
+                'protocol': 'binary' if self.binary else 'text',
                 'avg_duration': 0, 'median_duration': 0, 'min_duration': 0, 'max_duration': 0,
                 'avg_throughput': 0, 'median_throughput': 0, 'min_throughput': 0, 'max_throughput': 0,
                 'success_count': current_success_count,
@@ -330,6 +647,7 @@ class StressTestClient:
             'file_size_mb': file_size_mb if operation != 'list' else 'N/A',
             'client_pool_size': client_pool_size,
             'executor_type': executor_type,
+            'protocol': 'binary' if self.binary else 'text',
             'avg_duration': statistics.mean(durations) if durations else 0,
             'median_duration': statistics.median(durations) if durations else 0,
             'min_duration': min(durations) if durations else 0,
@@ -342,6 +660,8 @@ class StressTestClient:
             'fail_count': current_fail_count,
             'total_ops': total_ops
         }
+        if operation == 'session':
+            stats.update(self.session_stats(successful_ops, wall_time, session_requests, pipeline_depth))
         
         logger.info(f"Test complete for this configuration: {stats['success_count']} succeeded, {stats['fail_count']} failed from {stats['total_ops']} total attempts.")
         if durations:
@@ -351,6 +671,29 @@ class StressTestClient:
         
         return stats
 
+    def run_task(self, operation, worker_id, argument=None, session_requests=100, pipeline_depth=1):
+        if operation == 'upload':
+            return self.perform_upload(argument, worker_id)
+        if operation == 'download':
+            return self.perform_download(argument, worker_id)
+        if operation == 'list':
+            return self.perform_list(worker_id)
+        return self.perform_session(worker_id, session_requests, pipeline_depth)
+
+    def session_stats(self, results, wall_time, session_requests, pipeline_depth):
+        connect_times = [r['connect_time'] for r in results]
+        rates = [r['requests_per_sec'] for r in results]
+        total_requests = sum(r['requests'] for r in results)
+        return {
+            'session_requests': session_requests,
+            'pipeline_depth': pipeline_depth,
+            'avg_connect_time': statistics.mean(connect_times) if connect_times else 0,
+            'avg_conn_requests_per_sec': statistics.mean(rates) if rates else 0,
+            'min_conn_requests_per_sec': min(rates) if rates else 0,
+            'max_conn_requests_per_sec': max(rates) if rates else 0,
+            'total_requests_per_sec': total_requests / wall_time if wall_time > 0 else 0,
+        }
+
     def save_results_to_csv(self, all_stats_list, filename_prefix="stress_test_results"):
         if not all_stats_list:
             logger.info("No statistics to save.")
@@ -359,7 +702,10 @@ class StressTestClient:
         timestamp = time.strftime("%Y%m%d-%H%M%S")
         csv_filename = f"{filename_prefix}_{timestamp}.csv"
         
-        fieldnames = list(all_stats_list[0].keys())
+        # gabungan kolom semua baris, karena baris session punya kolom tambahan
+        fieldnames = []
+        for stats_row in all_stats_list:
+            fieldnames += [k for k in stats_row if k not in fieldnames]
         if 'total_ops' not in fieldnames:
              fieldnames.append('total_ops')
         if 'server_pool_size' not in fieldnames:
@@ -372,4 +718,37 @@ class StressTestClient:
                 writer.writerow(stats_row)
         
         logger.info(f"Results saved to {csv_filename}")
-        return csv_filename
\ No newline at end of file
+        return csv_filename
+
+
+# client milik worker process pada executor 'process', dibuat oleh init_process_worker
+_worker_client = None
+_worker_keep_connection = False
+
+
+def init_process_worker(server_address, binary, test_file=None, keep_connection=False, connect=True):
+    # dijalankan sekali per worker process: payload upload di-encode dan koneksi
+    # dibuka di sini, sehingga task hanya mengukur request ke server. Operasi
+    # session membuka koneksinya sendiri, jadi connect=False
+    global _worker_client, _worker_keep_connection
+    _worker_client = StressTestClient(server_address, binary, persistent=True)
+    _worker_keep_connection = keep_connection
+    if test_file:
+        _worker_client.upload_payload(test_file)
+    if not connect:
+        return
+    try:
+        with _worker_client.get_pool().session():
+            pass
+    except OSError as e:
+        logger.error(f"Worker process could not connect to {server_address}: {e}")
+
+
+def run_process_task(operation, worker_id, argument=None, session_requests=100, pipeline_depth=1):
+    try:
+        return _worker_client.run_task(operation, worker_id, argument, session_requests, pipeline_depth)
+    finally:
+        # tanpa --persistent koneksi tidak ditahan setelah task, karena koneksi idle
+        # menempati thread server dan bisa membuat worker lain menunggu selamanya
+        if not _worker_keep_connection:
+            _worker_client.get_pool().close()
@@ -3,8 +3,11 @@ import logging
 import os
 import time
 import sys
+import shlex
+import contextlib
 
 from stress_test_client import StressTestClient
+from server_launcher import ServerProcess, ResourceSampler
 
 def setup_logging(debug_mode=False, log_file="stress_test.log"):
     log_level = logging.DEBUG if debug_mode else logging.INFO
@@ -17,54 +20,130 @@ def setup_logging(debug_mode=False, log_file="stress_test.log"):
         ]
     )
 
-def run_all_tests_scenario(client, file_sizes, client_pool_sizes, server_pool_sizes, executor_types, operations):
+@contextlib.contextmanager
+def prepared_server(client, server_type, server_pool_size, launcher=None):
+    # launcher None: server dijalankan manual oleh operator seperti sebelumnya.
+    # Selain itu launcher berisi argumen ServerProcess, server baru dijalankan
+    # untuk pool size ini dan dihentikan lagi setelah semua test-nya selesai
+    if launcher is None:
+        logging.info(f"IMPORTANT: Please ensure the {server_type} server is (re)started with the "
+                     f"appropriate pool size ({server_pool_size}) before proceeding.")
+        input("Press Enter when the server is ready, or Ctrl+C to abort...")
+        yield None
+        return
+
+    server = ServerProcess(server_type, server_pool_size, **launcher).start()
+    saved_address = client.server_address
+    client.server_address = ('127.0.0.1', server.port)
+    try:
+        yield server
+    finally:
+        client.server_address = saved_address
+        server.stop()
+
+
+def run_one_test(client, server, operation, file_size_mb, client_pool_size, executor_type, *options):
+    # server None (mode --manual): tidak ada data resource server
+    if server is None:
+        return client.run_stress_test(operation, file_size_mb, client_pool_size, executor_type, *options)
+    before = server.usage()
+    sampler = ResourceSampler(server).start()
+    try:
+        stats = client.run_stress_test(operation, file_size_mb, client_pool_size, executor_type, *options)
+    finally:
+        sampled = sampler.stop()
+    if stats:
+        stats.update(server.usage_delta(before))
+        stats.update(sampled)
+    return stats
+
+
+def run_all_tests_scenario(client, file_sizes, client_pool_sizes, server_pool_sizes, executor_types, operations,
+                           server_type='thread', session_requests=100, pipeline_depth=1,
+                           target_rps=50, duration_s=10, mix='list=1', launcher=None):
     all_stats_collected = []
     for server_pool_size in server_pool_sizes:
         logging.info(f"--- Starting tests for server pool size: {server_pool_size} ---")
-        logging.info("IMPORTANT: Please ensure the server is (re)started with the "
-                     f"appropriate pool size ({server_pool_size}) before proceeding.")
         try:
-            input("Press Enter when the server is ready, or Ctrl+C to abort...")
+            with prepared_server(client, server_type, server_pool_size, launcher) as server:
+                all_stats_collected += run_server_matrix(
+                    client, server, server_type, server_pool_size, file_sizes, client_pool_sizes,
+                    executor_types, operations, session_requests, pipeline_depth, target_rps, duration_s, mix)
         except KeyboardInterrupt:
             logging.warning("Test run aborted by user.")
-            return []
-            
-        for executor_type in executor_types:
-            logging.info(f"--- Using client executor: {executor_type} ---")
-            for operation in operations:
-                current_file_sizes = file_sizes if operation in ['upload', 'download'] else [0]
-                for file_size_mb in current_file_sizes:
-                    for client_pool_size in client_pool_sizes:
-                        logging.info(f"*** Running: op={operation}, file_mb={file_size_mb if operation != 'list' else 'N/A'}, "
-                                     f"clients={client_pool_size}, server_pool={server_pool_size}, exec={executor_type} ***")
-                        
-                        stats = client.run_stress_test(operation, file_size_mb, client_pool_size, executor_type)
-                        
-                        if stats:
-                            stats['server_pool_size'] = server_pool_size
-                            all_stats_collected.append(stats)
-                        else:
-                            logging.warning(f"Skipped or failed test for op={operation}, file_mb={file_size_mb}, "
-                                            f"clients={client_pool_size}")
-                        time.sleep(1)
+            return all_stats_collected
+    return all_stats_collected
+
+
+def run_server_matrix(client, server, server_type, server_pool_size, file_sizes, client_pool_sizes,
+                      executor_types, operations, session_requests, pipeline_depth, target_rps, duration_s, mix):
+    all_stats_collected = []
+    for executor_type in executor_types:
+        logging.info(f"--- Using client executor: {executor_type} ---")
+        for operation in operations:
+            current_file_sizes = file_sizes if operation in ['upload', 'download', 'open_loop'] else [0]
+            for file_size_mb in current_file_sizes:
+                for client_pool_size in client_pool_sizes:
+                    logging.info(f"*** Running: op={operation}, file_mb={file_size_mb if operation != 'list' else 'N/A'}, "
+                                 f"clients={client_pool_size}, server_pool={server_pool_size}, exec={executor_type} ***")
+                    
+                    stats = run_one_test(client, server, operation, file_size_mb, client_pool_size, executor_type,
+                                         session_requests, pipeline_depth, target_rps, duration_s, mix)
+                    
+                    if stats:
+                        stats['server_type'] = server_type
+                        stats['server_pool_size'] = server_pool_size
+                        all_stats_collected.append(stats)
+                    else:
+                        logging.warning(f"Skipped or failed test for op={operation}, file_mb={file_size_mb}, "
+                                        f"clients={client_pool_size}")
+                    time.sleep(1)
     return all_stats_collected
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='File Server Stress Test Client')
     
-    parser.add_argument('--host', default='localhost', help='Server host (default: localhost)')
-    parser.add_argument('--port', type=int, default=6666, help='Server port (default: 6666)')
-    parser.add_argument('--operation', choices=['upload', 'download', 'list', 'all'], default='all', 
-                        help='Operation to test (default: all)')
+    parser.add_argument('--host', default='localhost', help='Server host, used with --manual (default: localhost)')
+    parser.add_argument('--port', type=int, default=6666, help='Server port, used with --manual (default: 6666)')
+    parser.add_argument('--operation', choices=['upload', 'download', 'list', 'session', 'open_loop', 'all'],
+                        default='all',
+                        help='Operation to test; session sends many LIST requests over one connection per worker, '
+                             'open_loop issues a --mix of requests at a fixed --rate (default: all)')
     parser.add_argument('--file-sizes', type=int, nargs='+', default=[10, 50, 100], 
                         help='File sizes in MB for upload/download (default: 10 50 100)')
     parser.add_argument('--client-pools', type=int, nargs='+', default=[1, 5, 50], 
                         help='Client worker pool sizes (default: 1 5 50)')
     parser.add_argument('--server-pools', type=int, nargs='+', default=[1, 5, 50], 
                         help='Server worker pool sizes to test against (default: 1 5 50)')
+    parser.add_argument('--server-type', choices=['thread', 'process', 'asyncio'], default='thread',
+                        help='Server implementation under test (default: thread)')
+    parser.add_argument('--manual', action='store_true',
+                        help='Do not launch the server; prompt the operator to restart it at --host/--port '
+                             'for every server pool size instead')
+    parser.add_argument('--server-args', default='',
+                        help='Extra arguments for the launched server, e.g. "--cache-mb 0 --reuse-port"')
+    parser.add_argument('--server-dir', default=None,
+                        help='Working (served) directory for the launched server (default: a fresh temporary directory)')
+    parser.add_argument('--server-log', default='stress_test_server.log',
+                        help='File that receives the launched server output (default: stress_test_server.log)')
     parser.add_argument('--executor', choices=['thread', 'process', 'both'], default='thread', 
                         help='Client executor type (default: thread)')
+    parser.add_argument('--binary', action='store_true',
+                        help='Use the binary frame protocol instead of text/base64 (default: text)')
+    parser.add_argument('--persistent', action='store_true',
+                        help='Reuse pooled connections for upload/download/list instead of one connection per operation')
+    parser.add_argument('--session-requests', type=int, default=100,
+                        help='Requests per connection for the session operation (default: 100)')
+    parser.add_argument('--pipeline-depth', type=int, default=1,
+                        help='Requests sent before reading responses in the session operation (default: 1)')
+    parser.add_argument('--rate', type=float, default=50,
+                        help='Target requests/sec for the open_loop operation (default: 50)')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Seconds to run the open_loop operation (default: 10)')
+    parser.add_argument('--mix', default='list=1',
+                        help='Weighted open_loop request mix, e.g. list=70,get=25,upload=5 (default: list=1); '
+                             'the client pool size caps requests in flight')
     parser.add_argument('--log-file', default='stress_test.log', help='Log file name')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     
@@ -89,7 +168,12 @@ if __name__ == "__main__":
     else:
         operations_to_test = [args.operation]
     
-    client = StressTestClient(server_address=(args.host, args.port))
+    client = StressTestClient(server_address=(args.host, args.port), binary=args.binary, persistent=args.persistent)
+
+    launcher = None
+    if not args.manual:
+        launcher = dict(extra_args=shlex.split(args.server_args), work_dir=args.server_dir,
+                        log_file=args.server_log)
     
     is_single_specific_run = (
         len(operations_to_test) == 1 and
@@ -103,26 +187,25 @@ if __name__ == "__main__":
 
     if is_single_specific_run:
         operation = operations_to_test[0]
-        file_size = file_sizes_to_test[0] if operation != 'list' else 0
+        file_size = file_sizes_to_test[0] if operation not in ('list', 'session') else 0
         client_pool = client_pool_sizes_to_test[0]
         server_pool = server_pool_sizes_to_test[0]
         executor_type = executor_types_to_test[0]
 
         logger.info(f"Running a single specific test: "
                     f"op={operation}, file_mb={file_size if operation != 'list' else 'N/A'}, "
-                    f"clients={client_pool}, server_pool_prompt={server_pool}, exec={executor_type}")
+                    f"clients={client_pool}, server_pool={server_pool}, exec={executor_type}")
         
-        if server_pool_sizes_to_test:
-            logging.info(f"IMPORTANT: Please ensure the server is (re)started with the "
-                         f"appropriate pool size ({server_pool}) before proceeding.")
-            try:
-                input("Press Enter when the server is ready, or Ctrl+C to abort...")
-            except KeyboardInterrupt:
-                logging.warning("Test run aborted by user.")
-                sys.exit(0)
-
-        stats = client.run_stress_test(operation, file_size, client_pool, executor_type)
+        try:
+            with prepared_server(client, args.server_type, server_pool, launcher) as server:
+                stats = run_one_test(client, server, operation, file_size, client_pool, executor_type,
+                                     args.session_requests, args.pipeline_depth,
+                                     args.rate, args.duration, args.mix)
+        except KeyboardInterrupt:
+            logging.warning("Test run aborted by user.")
+            sys.exit(0)
         if stats:
+            stats['server_type'] = args.server_type
             stats['server_pool_size'] = server_pool
             collected_stats.append(stats)
     else:
@@ -133,7 +216,14 @@ if __name__ == "__main__":
             client_pool_sizes_to_test, 
             server_pool_sizes_to_test,
             executor_types_to_test, 
-            operations_to_test
+            operations_to_test,
+            server_type=args.server_type,
+            session_requests=args.session_requests,
+            pipeline_depth=args.pipeline_depth,
+            target_rps=args.rate,
+            duration_s=args.duration,
+            mix=args.mix,
+            launcher=launcher
         )
 
     if collected_stats: